@@ -2,25 +2,69 @@
 #
 #
 
+import atexit
+import bz2
+import gzip
+import json
+import lzma
+import re
 import socket
+from array import array
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from ctypes import CDLL, get_errno
 from datetime import datetime
-from logging import getLogger
-from os import listdir, makedirs
-from os.path import exists, isdir, join
+from hashlib import sha256
+from io import BytesIO
+from itertools import chain, groupby, repeat
+from logging import DEBUG, getLogger
+from math import inf
+from mmap import ACCESS_READ, mmap
+from os import (
+    close,
+    getpid,
+    link,
+    listdir,
+    makedirs,
+    read,
+    remove,
+    replace,
+    stat,
+)
+from os.path import dirname, exists, isdir, isfile, join, split
+from selectors import EVENT_READ, DefaultSelector
 from string import Template
-
+from struct import Struct
+from subprocess import SubprocessError, run
+from sys import _current_frames
+from threading import BoundedSemaphore, Event, Lock, Thread, get_ident
+from time import monotonic, perf_counter, sleep
+from zlib import compress, decompress
+
+import dns.exception
+import dns.flags
+import dns.ipv6
+import dns.message
 import dns.name
+import dns.opcode
 import dns.query
+import dns.rcode
+import dns.rdata
+import dns.rdataclass
 import dns.rdatatype
 import dns.resolver
+import dns.ttl
 import dns.zone
 from dns import tsigkeyring
 from dns.exception import DNSException
 from dns.update import Update as DnsUpdate
 
 from octodns.provider.base import BaseProvider
-from octodns.record import Create, Record, Rr, Update
+from octodns.provider.plan import Plan
+from octodns.record import Create, Delete, Record, Rr, Update
 from octodns.source.base import BaseSource
+from octodns.zone import Zone
 
 # TODO: remove once we require python >= 3.11
 try:  # pragma: no cover
@@ -34,6 +78,75 @@ except ImportError:  # pragma: no cover
 __version__ = __VERSION__ = '1.1.0'
 
 
+def _fingerprint(ttl, rdatas):
+    return ttl, tuple(sorted(rdatas))
+
+
+def _rdata_to_text(_type, rdatas):
+    # rdatas as dnspython would write them, which is how they're read back,
+    # octoDNS writes some types differently, e.g. CAA, LOC, SVCB, and TXT
+    # with escapes
+    try:
+        return [
+            dns.rdata.from_text(dns.rdataclass.IN, _type, rdata).to_text()
+            for rdata in rdatas
+        ]
+    except (DNSException, ValueError):
+        return rdatas
+
+
+def _apply_changes(records, changes):
+    # The records that result from applying changes to records, the same as
+    # Zone.copy followed by Zone.apply but without hydrating and re-adding
+    # every record to a new zone. Records are identified by name and type.
+    applied = {(r.name, r._type): r for r in records}
+    for change in changes:
+        if isinstance(change, Delete):
+            record = change.existing
+            applied.pop((record.name, record._type), None)
+        else:
+            record = change.new
+            applied[(record.name, record._type)] = record
+    # records order by name and type, sorting on the keys is much cheaper
+    return [record for _, record in sorted(applied.items())]
+
+
+class _SingleFlight:
+    # Runs fn once per key no matter how many threads ask for it at the same
+    # time, the others wait for and share its result, or exception
+
+    def __init__(self):
+        self._lock = Lock()
+        # key -> Future of the call in flight
+        self._calls = {}
+
+    def __reduce__(self):
+        # locks can't be pickled, e.g. to ship a provider off to a worker
+        # process, and calls in flight wouldn't mean anything there anyway
+        return (self.__class__, ())
+
+    def do(self, key, fn, *args):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args)
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
 class RfcPopulate:
     SUPPORTS_DYNAMIC = False
     SUPPORTS_GEO = False
@@ -62,6 +175,19 @@ class RfcPopulate:
         )
     )
 
+    lazy_existing = False
+    _profiler = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # concurrent loads or transfers of the same thing share a single one
+        self._single_flight = _SingleFlight()
+
+    def _profile(self, zone_name, phase):
+        if self._profiler is None:
+            return nullcontext()
+        return self._profiler.phase(zone_name, phase)
+
     def populate(self, zone, target=False, lenient=False):
         self.log.debug(
             'populate: name=%s, target=%s, lenient=%s',
@@ -72,8 +198,19 @@ class RfcPopulate:
 
         before = len(zone.records)
         rrs = self.zone_records(zone, target=target)
-        for record in Record.from_rrs(zone, rrs, lenient=lenient):
-            zone.add_record(record, lenient=lenient)
+        if target and self.lazy_existing:
+            # records are built when planning, once we know what's desired,
+            # see _process_existing_zone
+            nodes = defaultdict(list)
+            for rr in rrs:
+                nodes[(rr.name, rr._type)].append(rr)
+            self._lazy_nodes[zone.name] = (nodes, lenient)
+            self.log.info('populate:   found %s nodes', len(nodes))
+            return self.zone_exists(zone, target)
+
+        with self._profile(zone.name, 'from_rrs'):
+            for record in Record.from_rrs(zone, rrs, lenient=lenient):
+                zone.add_record(record, lenient=lenient)
 
         self.log.info(
             'populate:   found %s records', len(zone.records) - before
@@ -81,6 +218,62 @@ class RfcPopulate:
 
         return self.zone_exists(zone, target)
 
+    def export_columnar(self, filename, zone_names):
+        '''
+        Writes the records of zone_names out to filename in a compact columnar
+        format that ColumnarSource can read back much more quickly than they
+        can be parsed or transferred. Returns the number of rows written.
+        '''
+        writer = _ColumnarWriter()
+        for zone_name in zone_names:
+            zone = Zone(zone_name, [])
+            writer.add(zone_name, self.zone_records(zone, target=False))
+        writer.write(filename)
+        self.log.info(
+            'export_columnar: wrote %d rows for %d zones',
+            writer.rows,
+            len(writer.dictionaries['zone']),
+        )
+        return writer.rows
+
+    def _process_existing_zone(self, existing, desired, lenient=False):
+        if self.lazy_existing and existing.name in self._lazy_nodes:
+            nodes, populate_lenient = self._lazy_nodes.pop(existing.name)
+            desired_records = {(r.fqdn, r._type): r for r in desired.records}
+            rrs = []
+            built = 0
+            for key, node in nodes.items():
+                record = desired_records.get(key)
+                if record is not None:
+                    _, ttl, _type, rdatas = record.rrs
+                    fingerprint = _fingerprint(
+                        node[0].ttl, [rr.rdata for rr in node]
+                    )
+                    # the text's almost always the same, only when it isn't
+                    # is it worth parsing to see if the values are
+                    if _fingerprint(ttl, rdatas) == fingerprint or (
+                        _fingerprint(ttl, _rdata_to_text(_type, rdatas))
+                        == fingerprint
+                    ):
+                        # unchanged, desired's record will do for existing
+                        existing.add_record(record, lenient=populate_lenient)
+                        continue
+                rrs.extend(node)
+                built += 1
+            for record in Record.from_rrs(
+                existing, rrs, lenient=populate_lenient
+            ):
+                existing.add_record(record, lenient=populate_lenient)
+            self.log.info(
+                '_process_existing_zone: built %d of %d records',
+                built,
+                len(nodes),
+            )
+
+        return super()._process_existing_zone(
+            existing, desired, lenient=lenient
+        )
+
 
 class ZoneFileSourceException(Exception):
     pass
@@ -96,6 +289,701 @@ class ZoneFileSourceLoadFailure(ZoneFileSourceException):
         super().__init__(str(error))
 
 
+class _ZoneFileUnsupported(Exception):
+    # raised by _parse_zone_file when it runs into something it doesn't handle
+    # so that the caller can fall back to dnspython
+    pass
+
+
+_ZONE_FILE_TOKEN_RE = re.compile(
+    rb'(?P<ws>[ \t\r]+)|(?P<nl>\n)|(?P<comment>;[^\n]*)|(?P<open>\()'
+    rb'|(?P<close>\))|(?P<word>"(?:[^"\\\n]|\\.)*"|(?:[^\s;"()\\]|\\.)+)'
+)
+_ZONE_FILE_NAME_RE = re.compile(r'@|(?:[\w*/-]+\.)*[\w*/-]*', re.ASCII)
+_ZONE_FILE_IPV4_RE = re.compile(
+    r'(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}'
+    r'(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)',
+    re.ASCII,
+)
+# one or more quoted strings of printable ascii that don't need escaping
+_ZONE_FILE_TXT_RE = re.compile(
+    r'"[ !#-\[\]-~]{0,255}"(?: "[ !#-\[\]-~]{0,255}")*', re.ASCII
+)
+# the start of any $INCLUDE line
+_ZONE_FILE_INCLUDE_RE = re.compile(rb'^\$INCLUDE\b', re.M)
+# a zone file's shards live in a directory named for it with this suffix
+_ZONE_FILE_SHARDS_SUFFIX = '.shards'
+# how compressed zone files are opened, by extension
+_ZONE_FILE_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+_ZONE_FILE_CLASSES = (b'ANY', b'CH', b'CHAOS', b'HESIOD', b'HS', b'NONE')
+_ZONE_FILE_NAME_TYPES = ('CNAME', 'NS', 'PTR')
+
+
+def _zone_file_lines(buf):
+    # Splits the zone file up into logical lines, lists of tokens with
+    # parenthesized continuations joined and comments dropped. Tokens are only
+    # copied out of buf as they're needed.
+    tokens = []
+    leading = False
+    depth = 0
+    pos = 0
+    for match in _ZONE_FILE_TOKEN_RE.finditer(buf):
+        if match.start() != pos:
+            # something the regex skipped over, e.g. an unterminated quote
+            raise _ZoneFileUnsupported()
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == 'word':
+            tokens.append(match.group())
+        elif kind == 'ws':
+            start = match.start()
+            if not tokens and (start == 0 or buf[start - 1] == 10):
+                # the line starts with whitespace, the owner is omitted
+                leading = True
+        elif kind == 'nl':
+            if depth == 0:
+                if tokens:
+                    yield leading, tokens
+                    tokens = []
+                leading = False
+        elif kind == 'open':
+            depth += 1
+        elif kind == 'close':
+            if depth == 0:
+                raise _ZoneFileUnsupported()
+            depth -= 1
+        # else comment, nothing to do
+
+    if pos != len(buf) or depth != 0:
+        raise _ZoneFileUnsupported()
+    if tokens:
+        yield leading, tokens
+
+
+def _zone_file_name(name, origin):
+    if not _ZONE_FILE_NAME_RE.fullmatch(name):
+        raise _ZoneFileUnsupported()
+    if name == '@':
+        return origin
+    elif name.endswith('.'):
+        return name
+    return f'{name}.{origin}'
+
+
+def _zone_file_ttl(token):
+    try:
+        return dns.ttl.from_text(token.decode())
+    except dns.ttl.BadTTL:
+        raise _ZoneFileUnsupported() from None
+
+
+def _parse_zone_file(buf, zone_name, check_origin):
+    '''
+    Parses the zone file contents in `buf`, anything bytes-like, e.g. an mmap,
+    returning the same (name, ttl, type, rdata text) tuples, in the same
+    order, that dnspython's Zone.iterate_rdatas would. Raises
+    _ZoneFileUnsupported when the file uses syntax it doesn't handle.
+    '''
+    zone_origin = zone_name.lower()
+    origin = zone_name
+    origin_name = dns.name.from_text(origin)
+    last_name = origin
+    last_ttl = None
+    default_ttl = None
+    rdtypes = {}
+    converted = {}
+    # lowered owner name -> (owner name, {rdtype: [ttl, {rdata: None}]})
+    nodes = {}
+
+    for leading, tokens in _zone_file_lines(buf):
+        try:
+            first = tokens[0]
+            if not leading and first[:1] == b'$':
+                directive = first.upper()
+                if len(tokens) != 2:
+                    raise _ZoneFileUnsupported()
+                elif directive == b'$ORIGIN':
+                    origin = tokens[1].decode()
+                    if not origin.endswith('.'):
+                        # dnspython doesn't make these relative to anything
+                        raise _ZoneFileUnsupported()
+                    origin = _zone_file_name(origin, None)
+                    origin_name = dns.name.from_text(origin)
+                elif directive == b'$TTL':
+                    default_ttl = _zone_file_ttl(tokens[1])
+                else:
+                    # $INCLUDE, $GENERATE, ...
+                    raise _ZoneFileUnsupported()
+                continue
+
+            i = 0
+            if not leading:
+                last_name = _zone_file_name(first.decode(), origin)
+                i = 1
+            name = last_name
+            lowered = name.lower()
+            if lowered != zone_origin and not lowered.endswith(
+                f'.{zone_origin}'
+            ):
+                # outside of the zone, ignored
+                continue
+
+            ttl = None
+            if tokens[i][:1].isdigit():
+                ttl = last_ttl = _zone_file_ttl(tokens[i])
+                i += 1
+            token = tokens[i].upper()
+            if token == b'IN':
+                i += 1
+            elif token in _ZONE_FILE_CLASSES or token.startswith(b'CLASS'):
+                raise _ZoneFileUnsupported()
+            if ttl is None:
+                if tokens[i][:1].isdigit():
+                    ttl = last_ttl = _zone_file_ttl(tokens[i])
+                    i += 1
+                elif default_ttl is not None:
+                    ttl = default_ttl
+                else:
+                    ttl = last_ttl
+
+            token = tokens[i]
+            rdata = b' '.join(tokens[i + 1 :]).decode()
+        except (IndexError, UnicodeDecodeError):
+            raise _ZoneFileUnsupported() from None
+
+        try:
+            rdtype = rdtypes[token]
+        except KeyError:
+            try:
+                rdtype = dns.rdatatype.to_text(
+                    dns.rdatatype.from_text(token.decode())
+                )
+            except Exception:
+                raise _ZoneFileUnsupported() from None
+            rdtypes[token] = rdtype
+
+        if rdtype == 'SOA':
+            try:
+                rd = dns.rdata.from_text(
+                    dns.rdataclass.IN, rdtype, rdata, origin_name, False
+                )
+            except Exception:
+                raise _ZoneFileUnsupported() from None
+            if default_ttl is None:
+                # the pre-RFC2308 behavior dnspython & BIND follow, the zone's
+                # default TTL comes from the SOA's minimum
+                default_ttl = rd.minimum
+                if ttl is None:
+                    ttl = rd.minimum
+            text = rd.to_text()
+        else:
+            key = (rdtype, rdata, origin)
+            try:
+                text = converted[key]
+            except KeyError:
+                # shortcuts for the common cases where we can get to the same
+                # text dnspython would without parsing the rdata
+                if rdtype == 'A' and _ZONE_FILE_IPV4_RE.fullmatch(rdata):
+                    text = rdata
+                elif rdtype == 'AAAA' and ' ' not in rdata:
+                    try:
+                        text = dns.ipv6.canonicalize(rdata)
+                    except dns.exception.SyntaxError:
+                        raise _ZoneFileUnsupported() from None
+                elif rdtype in ('SPF', 'TXT') and _ZONE_FILE_TXT_RE.fullmatch(
+                    rdata
+                ):
+                    text = rdata
+                elif rdtype in _ZONE_FILE_NAME_TYPES and (
+                    _ZONE_FILE_NAME_RE.fullmatch(rdata)
+                ):
+                    text = _zone_file_name(rdata, origin)
+                else:
+                    try:
+                        text = dns.rdata.from_text(
+                            dns.rdataclass.IN, rdtype, rdata, origin_name, False
+                        ).to_text()
+                    except Exception:
+                        raise _ZoneFileUnsupported() from None
+                converted[key] = text
+
+        if ttl is None:
+            # no TTL to be found anywhere
+            raise _ZoneFileUnsupported()
+
+        try:
+            node = nodes[lowered][1]
+        except KeyError:
+            node = {}
+            nodes[lowered] = (name, node)
+        try:
+            rdataset = node[rdtype]
+            # rdatasets share the lowest TTL of their members
+            rdataset[0] = min(rdataset[0], ttl)
+            rdataset[1][text] = None
+        except KeyError:
+            node[rdtype] = [ttl, {text: None}]
+
+    for _, node in nodes.values():
+        if 'CNAME' in node and len(node) > 1:
+            # leave deciding whether or not this is OK to dnspython
+            raise _ZoneFileUnsupported()
+    if check_origin:
+        apex = nodes.get(zone_origin, (None, {}))[1]
+        if 'SOA' not in apex or 'NS' not in apex:
+            raise _ZoneFileUnsupported()
+
+    return [
+        (name, ttl, rdtype, text)
+        for name, node in nodes.values()
+        for rdtype, (ttl, texts) in node.items()
+        for text in texts
+    ]
+
+
+class _PollingZoneFileWatcher:
+    # Finds changed zone files by comparing stat results between calls
+
+    def __init__(self, provider):
+        self.provider = provider
+        self._stats = self._scan()
+
+    def _scan(self):
+        provider = self.provider
+        stats = {}
+        if isdir(provider.directory):
+            for directory in provider._zone_directories():
+                for filename in listdir(directory):
+                    if _uncompressed(filename).endswith(
+                        provider.file_extension
+                    ):
+                        path = join(directory, filename)
+                        st = stat(path)
+                        stats[path] = (st.st_mtime_ns, st.st_size, st.st_ino)
+                        shards = f'{path}{_ZONE_FILE_SHARDS_SUFFIX}'
+                        if isdir(shards):
+                            for shard in listdir(shards):
+                                shard = join(shards, shard)
+                                st = stat(shard)
+                                stats[shard] = (
+                                    st.st_mtime_ns,
+                                    st.st_size,
+                                    st.st_ino,
+                                )
+        return stats
+
+    def changed(self):
+        previous, self._stats = self._stats, self._scan()
+        # a change to a shard is a change to the zone file it belongs to
+        return {
+            _shard_master(path)
+            for path in previous.keys() | self._stats.keys()
+            if previous.get(path) != self._stats.get(path)
+        }
+
+
+class _InotifyZoneFileWatcher:
+    # Finds changed zone files using Linux's inotify, via ctypes so there's no
+    # extra dependency. Raises AttributeError or OSError when it's unavailable.
+
+    # from <sys/inotify.h>
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = Struct('iIII')
+
+    _fd = -1
+
+    def __init__(self, provider):
+        self.provider = provider
+        libc = CDLL(None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(get_errno(), 'inotify_init1 failed')
+        self._fd = fd
+        # watch descriptor -> (directory, depth)
+        self._watches = {}
+        # what's already there when we start isn't a change
+        self._watch(provider.directory, 0)
+
+    def __del__(self):
+        if self._fd >= 0:
+            close(self._fd)
+            self._fd = -1
+
+    def _watch(self, directory, depth):
+        wd = self._add_watch(self._fd, directory.encode(), self.MASK)
+        if wd < 0:
+            raise OSError(get_errno(), f'inotify_add_watch failed: {directory}')
+        self._watches[wd] = (directory, depth)
+
+        # pick up anything that was already there, including subdirectories
+        # created before we started watching
+        paths = set()
+        for filename in listdir(directory):
+            path = join(directory, filename)
+            if depth < self.provider.directory_depth:
+                if isdir(path):
+                    paths |= self._watch(path, depth + 1)
+            elif self._is_shards(path, depth) and isdir(path):
+                paths |= self._watch(path, depth + 1)
+            else:
+                # a change to a shard is a change to its zone file
+                paths.add(_shard_master(path))
+        return paths
+
+    def _is_shards(self, path, depth):
+        # zone files' shards are in a directory alongside them
+        return depth == self.provider.directory_depth and path.endswith(
+            _ZONE_FILE_SHARDS_SUFFIX
+        )
+
+    def changed(self):
+        paths = set()
+        overflowed = False
+        while True:
+            try:
+                buf = read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _, n = self.EVENT.unpack_from(buf, offset)
+                offset += self.EVENT.size
+                name = buf[offset : offset + n].rstrip(b'\0').decode()
+                offset += n
+                if mask & self.IN_Q_OVERFLOW:
+                    overflowed = True
+                    continue
+                directory, depth = self._watches[wd]
+                path = join(directory, name)
+                created_dir = mask & self.IN_ISDIR and mask & self.IN_CREATE
+                if depth < self.provider.directory_depth:
+                    if created_dir:
+                        # a new shard directory, files may have been written to
+                        # it before we got here
+                        paths |= self._watch(path, depth + 1)
+                elif created_dir and self._is_shards(path, depth):
+                    paths |= self._watch(path, depth + 1)
+                else:
+                    paths.add(_shard_master(path))
+
+        if overflowed:
+            return None
+        return paths
+
+
+class _Profiler:
+    # Samples the stack of the thread running each phase every interval
+    # seconds. Nothing is running, or sampled, outside of phases. A zone's
+    # stacks are written out once its last phase, writing it, is done and
+    # everything else, along with the summary, when flushed, which happens at
+    # exit.
+
+    LAST_PHASE = 'write'
+
+    def __init__(self, directory, interval=0.001):
+        self.directory = directory
+        self.interval = interval
+        # zone name -> collapsed stack -> samples
+        self.stacks = {}
+        # (zone name, phase) -> [seconds, samples]
+        self.timings = {}
+        # zones with samples that haven't been written out
+        self._unwritten = set()
+        # whether there's anything new for the summary
+        self._changed = False
+        atexit.register(self.flush)
+
+    @contextmanager
+    def phase(self, zone_name, phase):
+        ident = get_ident()
+        stacks = self.stacks.setdefault(zone_name, Counter())
+        timing = self.timings.setdefault((zone_name, phase), [0.0, 0])
+        stop = Event()
+
+        def sample():
+            while not stop.wait(self.interval):
+                frame = _current_frames().get(ident)
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(
+                        f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})'
+                    )
+                    frame = frame.f_back
+                names.append(phase)
+                stacks[';'.join(reversed(names))] += 1
+                timing[1] += 1
+
+        sampler = Thread(target=sample, daemon=True)
+        start = perf_counter()
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            sampler.join()
+            timing[0] += perf_counter() - start
+            self._changed = True
+            if phase == self.LAST_PHASE:
+                self._write_folded(zone_name)
+            else:
+                self._unwritten.add(zone_name)
+
+    def _write_folded(self, zone_name):
+        self._unwritten.discard(zone_name)
+        makedirs(self.directory, exist_ok=True)
+        filename = zone_name[:-1].replace('/', '-')
+        _write_atomic(
+            join(self.directory, f'{filename}.folded'),
+            (
+                f'{stack} {samples}\n'
+                for stack, samples in sorted(self.stacks[zone_name].items())
+            ),
+        )
+
+    def flush(self):
+        '''
+        Writes out the stacks of any zones that haven't been yet, e.g. ones
+        that were populated but not applied, and the summary of everything.
+        '''
+        for zone_name in sorted(self._unwritten):
+            self._write_folded(zone_name)
+        if not self._changed:
+            return
+        self._changed = False
+
+        makedirs(self.directory, exist_ok=True)
+        width = max(len(z) for z, _ in self.timings)
+        lines = [
+            f'{"zone":<{width}} {"phase":<13} {"seconds":>10} {"samples":>8}\n'
+        ]
+        for (z, phase), (seconds, samples) in sorted(self.timings.items()):
+            lines.append(
+                f'{z:<{width}} {phase:<13} {seconds:10.4f} {samples:8d}\n'
+            )
+        _write_atomic(join(self.directory, 'summary.txt'), lines)
+
+
+def _load_zone_buf(buf, zone_name, check_origin, fast_load):
+    if fast_load:
+        try:
+            return _parse_zone_file(buf, zone_name, check_origin)
+        except _ZoneFileUnsupported:
+            pass
+    try:
+        # universal newlines and $INCLUDE, as from_file has, for compressed
+        # zone files
+        text = buf.decode().replace('\r\n', '\n').replace('\r', '\n')
+        z = dns.zone.from_text(
+            text,
+            zone_name,
+            relativize=False,
+            check_origin=check_origin,
+            allow_include=True,
+        )
+    except DNSException as error:
+        raise ZoneFileSourceLoadFailure(error)
+    return [
+        (name.to_text(), ttl, dns.rdatatype.to_text(rdata.rdtype), rdata)
+        for name, ttl, rdata in z.iterate_rdatas()
+    ]
+
+
+def _load_zone_shard(path, zone_name, fast_load):
+    # module level so that it can be run in worker processes, rdata goes back
+    # as text as it's much cheaper to ship around than Rdata objects
+    with _open_zone_file(path) as fh:
+        buf = fh.read()
+    return [
+        (name, ttl, rdtype, str(rdata))
+        for name, ttl, rdtype, rdata in _load_zone_buf(
+            buf, zone_name, False, fast_load
+        )
+    ]
+
+
+def _rdata_texts(record):
+    # the zone file text of each of record's values
+    try:
+        values = record.values
+    except AttributeError:
+        values = [record.value]
+    if record._type in ('SPF', 'TXT'):
+        # TXT values need to be quoted and split if longer than 255 characters
+        chunked_value = record.chunked_value
+        return [chunked_value(v.rdata_text) for v in values]
+    return [v.rdata_text for v in values]
+
+
+def _compute_zonemd(
+    origin,
+    rrsets,
+    hash_algorithm=dns.zone.DigestHashAlgorithm.SHA384,
+    scheme=dns.zone.DigestScheme.SIMPLE,
+):
+    # The RFC 8976 ZONEMD rdata of the zone made up of rrsets, (fqdn, ttl,
+    # type, [rdata text]), which has to include the SOA
+    zone = dns.zone.Zone(origin, relativize=False)
+    for fqdn, ttl, _type, rdatas in rrsets:
+        rdataset = zone.find_rdataset(fqdn, _type, create=True)
+        for rdata in rdatas:
+            rdataset.add(
+                dns.rdata.from_text(
+                    dns.rdataclass.IN, _type, rdata, zone.origin, False
+                ),
+                ttl,
+            )
+    return zone.compute_digest(hash_algorithm, scheme)
+
+
+def _mirror_rrsets(rrs, supports):
+    # Groups rrs into {(name, type): [ttl, [rdata]]} keeping only the types in
+    # supports. Names are lowercased, as Record would, and RRsets take the
+    # lowest TTL of their RRs.
+    rrsets = {}
+    for rr in rrs:
+        if rr._type not in supports:
+            continue
+        key = (rr.name.lower(), rr._type)
+        try:
+            rrset = rrsets[key]
+            rrset[0] = min(rrset[0], rr.ttl)
+            rrset[1].append(rr.rdata)
+        except KeyError:
+            rrsets[key] = [rr.ttl, [rr.rdata]]
+    return rrsets
+
+
+def _mirror(target, source, zone_names):
+    # the guts of ZoneFileProvider.mirror and Rfc2136Provider.mirror
+    if zone_names is None:
+        zone_names = list(source.list_zones())
+
+    start = perf_counter()
+    results = {}
+    failed = 0
+    for zone_name in zone_names:
+        zone = Zone(zone_name, [])
+        try:
+            rrs = source.zone_records(zone, target=False)
+            rrsets = _mirror_rrsets(rrs, target.SUPPORTS)
+            results[zone_name] = target._mirror_zone(zone, rrsets)
+        except Exception as err:
+            target.log.error('mirror: zone=%s, failed: %s', zone_name, err)
+            results[zone_name] = err
+            failed += 1
+
+    target.log.info(
+        'mirror: mirrored %d zones, %d failed in %.2fs',
+        len(results) - failed,
+        failed,
+        perf_counter() - start,
+    )
+
+    return results
+
+
+def _rendezvous(name, count):
+    # The shards in the order that name prefers them, highest random weight
+    # hashing, so changing count only moves names to or from the shards that
+    # were added or removed
+    return sorted(
+        range(count),
+        key=lambda i: sha256(f'{i} {name}'.encode()).digest(),
+        reverse=True,
+    )
+
+
+def _assign_shards(weights, count, slack=1.25):
+    # Consistent hashing with bounded loads. Heaviest first, each name goes to
+    # the shard it most prefers that has room for it under slack times the
+    # average load, or failing that to the least loaded.
+    cap = slack * sum(weights.values()) / count
+    loads = [0] * count
+    assignments = {}
+    for name, weight in sorted(weights.items(), key=lambda i: (-i[1], i[0])):
+        preferences = _rendezvous(name, count)
+        for shard in preferences:
+            if loads[shard] + weight <= cap:
+                break
+        else:
+            shard = min(preferences, key=loads.__getitem__)
+        loads[shard] += weight
+        assignments[name] = shard
+    return assignments
+
+
+def _shard_master(path):
+    # the zone file a shard file belongs to, or path itself when it isn't one
+    directory = dirname(path)
+    if directory.endswith(_ZONE_FILE_SHARDS_SUFFIX):
+        return directory[: -len(_ZONE_FILE_SHARDS_SUFFIX)]
+    return path
+
+
+def _split_shards(filename, buf):
+    # Splits the zone file filename, with contents buf, written with shards
+    # into its contents without the $INCLUDEs of its shards and the paths of
+    # the shards relative to it. Returns None if it includes anything else,
+    # e.g. a hand-written file, those are left to dnspython as they can carry
+    # an origin and are relative to the working directory.
+    directory = f'{filename}{_ZONE_FILE_SHARDS_SUFFIX}/'.encode()
+    exts = b'|'.join(re.escape(ext.encode()) for ext in _ZONE_FILE_OPENERS)
+    shard_re = re.compile(
+        rb'^\$INCLUDE[ \t]+('
+        + re.escape(directory)
+        + rb'\d{4}(?:'
+        + exts
+        + rb')?)[ \t]*(?:\n|\Z)',
+        re.M,
+    )
+    includes = shard_re.findall(buf)
+    if not includes or len(includes) != len(_ZONE_FILE_INCLUDE_RE.findall(buf)):
+        return None
+    return shard_re.sub(b'', buf), [include.decode() for include in includes]
+
+
+def _uncompressed(filename):
+    # filename without any compression extension
+    for ext in _ZONE_FILE_OPENERS:
+        if filename.endswith(ext):
+            return filename[: -len(ext)]
+    return filename
+
+
+def _open_zone_file(path, mode='rb'):
+    # decompresses on the fly when path has a compression extension
+    opener = _ZONE_FILE_OPENERS.get(path[len(_uncompressed(path)) :], open)
+    return opener(path, mode)
+
+
+def _write_atomic(filename, chunks, mode='w', opener=open):
+    # write to a temporary file alongside the real one and then move it into
+    # place so that nothing ever sees a partially written file
+    directory, basename = split(filename)
+    tmp = join(directory, f'.{basename}.{getpid()}.{get_ident()}.tmp')
+    try:
+        with opener(tmp, mode) as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+        replace(tmp, filename)
+    except BaseException:
+        if exists(tmp):
+            remove(tmp)
+        raise
+
+
 class ZoneFileProvider(RfcPopulate, BaseProvider):
     '''
     Provider that reads and writes BIND style zone files
@@ -147,8 +1035,147 @@ class ZoneFileProvider(RfcPopulate, BaseProvider):
         # the existing apex NS, otherwise octodns will raise RootNsChange.
         # (default: false)
         read_existing: false
+
+        # How zone files are laid out under `directory`. `flat` keeps them all
+        # directly in `directory`. With lots of zones that can be slow to list
+        # and look files up in, especially on network storage, so `hashed` and
+        # `prefix` spread them out over `directory_depth` levels of
+        # subdirectories. `hashed` names the subdirectories with the leading
+        # characters of a hash of the zone's filename, e.g.
+        # `6/6c/example.com.`, and `prefix` with the leading characters of the
+        # filename itself, e.g. `e/ex/example.com.`. Existing flat directories
+        # can be moved into the configured layout with `migrate_directory`.
+        # (default: flat)
+        directory_layout: flat
+
+        # The number of levels of subdirectories to use with `hashed` and
+        # `prefix` layouts.
+        # (default: 2)
+        directory_depth: 2
+
+        # Read zone files with a memory-mapped, regex based, parser that's
+        # much quicker than dnspython's for large zones. It handles the
+        # commonly used subset of the zone file syntax, owner, TTL, class,
+        # type, rdata, parentheses, comments, quoted strings, $ORIGIN and $TTL,
+        # and hands any file that uses anything else over to dnspython.
+        # (default: false)
+        fast_load: false
+
+        # Watch `directory` for zone files being created, modified, or removed,
+        # using inotify on Linux and falling back to polling elsewhere. This
+        # is meant for long-running processes that populate repeatedly, call
+        # `dirty_zones` before each sync to find out which zones changed and
+        # drop their cached records so that only they are re-read.
+        # (default: false)
+        watch: false
+
+        # With read_existing, hold on to the existing records as cheap
+        # fingerprints of their TTL and values when planning and only build
+        # full octoDNS records for those that don't match the desired ones.
+        # Speeds up planning large zones where little has changed.
+        # (default: false)
+        lazy_existing: false
+
+        # Write a digest of the zone's contents, everything but the serial,
+        # into a comment at the top of each zone file. With read_existing, a
+        # zone whose digest matches what's desired is treated as unchanged
+        # without parsing its file, and applies that wouldn't change a file's
+        # contents leave it, and its serial, alone.
+        # (default: false)
+        content_digest: false
+
+        # Profile populate and apply, writing per-zone collapsed stack files,
+        # <zone>.folded, suitable for flame graph tools along with a summary of
+        # the time spent in each phase, summary.txt, to this directory. The
+        # phases are loading the zone file, converting its rdata to text,
+        # building records, applying changes, and writing the zone file. A
+        # zone's stacks are written once it's been written, the rest, and the
+        # summary, when the process exits.
+        # (default: disabled)
+        profile_directory: ./profiles
+
+        # Write smaller zone files, with a $TTL of the most common TTL which is
+        # then left off of records that use it, owner names only when they
+        # change, and no column padding.
+        # (default: false)
+        compact: false
+
+        # Split each zone across this many shard files, $INCLUDE'd from the
+        # main zone file which keeps the SOA and everything else at the apex.
+        # Records are spread over the shards by a hash of their name and only
+        # the shards whose contents changed are rewritten. Shards are read in
+        # parallel. They live in a <zone file>.shards directory next to the
+        # zone file and are included by paths relative to it, so Bind's
+        # `directory` needs to be the one the zone files are in. Files that
+        # $INCLUDE anything else are read by dnspython, as they always were.
+        # (default: 0, disabled)
+        shards: 0
+
+        # Compress zone files as they're written, one of gzip, bz2, or xz. The
+        # matching extension, .gz, .bz2, or .xz, is added after
+        # file_extension. Compressed zone files are always recognized by their
+        # extension and decompressed when read, whatever this is set to. Bind
+        # can't load compressed zone files so this is for archival and
+        # octoDNS only use.
+        # (default: null, uncompressed)
+        compression: null
+
+        # IP addresses of servers to send a DNS NOTIFY to for each zone whose
+        # file was rewritten, e.g. secondaries that should transfer it
+        # (default: empty, none)
+        notify: []
+        # The port notify servers are listening on
+        # (default: 53)
+        notify_port: 53
+        # A command to run to reload each zone whose file was rewritten, with
+        # $zone replaced by the zone's name, so that only changed zones are
+        # reloaded rather than everything with a blanket `rndc reload`
+        # (default: null, none)
+        reload_command:
+          - rndc
+          - reload
+          - $zone
+        # The number of notifies and reloads that can be in flight at once.
+        # They're sent in the background and waited for when the process
+        # exits, or when `wait_notifications` is called.
+        # (default: 4)
+        notify_workers: 4
+        # Seconds to wait for each notify or reload to complete
+        # (default: 2)
+        notify_timeout: 2
+
+        # Split the zones up across a fleet of workers, each configured with
+        # the same zone_shard_count and its own zone_shard_index, so that
+        # list_zones only returns this worker's share of them and populating
+        # any other zone as a source is an error. Zones are assigned by
+        # rendezvous hashing, so changing the number of workers only moves
+        # some of the zones around.
+        # (default: 0 of 1, everything)
+        zone_shard_index: 0
+        zone_shard_count: 1
+        # A file of zone weights, shared by all of the workers, to balance
+        # the shards by. When it doesn't exist the first worker to need it
+        # writes the current zone file sizes to it and everyone uses those
+        # from then on, so assignments don't move about as the zone files
+        # are rewritten. Zones are then assigned by consistent hashing with
+        # bounded loads. Remove it to rebalance.
+        # (default: none, unweighted)
+        zone_shard_weights: ./zone-shard-weights.json
+
+        # Add an RFC 8976 ZONEMD record, a SHA-384 digest of everything in the
+        # zone, after the SOA so that the zone's contents can be verified, and
+        # compared against what octoDNS wants, without transferring it
+        # (default: false)
+        zonemd: false
     '''
 
+    DIRECTORY_LAYOUTS = ('flat', 'hashed', 'prefix')
+
+    # The number of zone file lines buffered up before they're written out
+    RENDER_CHUNK_SIZE = 8192
+    COMPRESSIONS = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz'}
+    DIGEST_PREFIX = b'; Digest: sha256:'
+
     def __init__(
         self,
         id,
@@ -162,12 +1189,31 @@ class ZoneFileProvider(RfcPopulate, BaseProvider):
         expire=604800,
         nxdomain=3600,
         read_existing=False,
+        directory_layout='flat',
+        directory_depth=2,
+        fast_load=False,
+        watch=False,
+        lazy_existing=False,
+        content_digest=False,
+        profile_directory=None,
+        compact=False,
+        shards=0,
+        compression=None,
+        notify=[],
+        notify_port=53,
+        reload_command=None,
+        notify_workers=4,
+        notify_timeout=2,
+        zone_shard_index=0,
+        zone_shard_count=1,
+        zonemd=False,
+        zone_shard_weights=None,
         *args,
         **kwargs,
     ):
         self.log = getLogger(f'ZoneFileProvider[{id}]')
         self.log.debug(
-            '__init__: id=%s, directory=%s, file_extension=%s, check_origin=%s, hostmaster_email=%s, default_ttl=%d, refresh=%d, retry=%d, expire=%d, nxdomain=%d, read_existing=%s',
+            '__init__: id=%s, directory=%s, file_extension=%s, check_origin=%s, hostmaster_email=%s, default_ttl=%d, refresh=%d, retry=%d, expire=%d, nxdomain=%d, read_existing=%s, directory_layout=%s, directory_depth=%d, fast_load=%s, watch=%s, lazy_existing=%s, content_digest=%s, profile_directory=%s, compact=%s, shards=%d, compression=%s, notify=%s, notify_port=%d, reload_command=%s, notify_workers=%d, notify_timeout=%s, zone_shard_index=%d, zone_shard_count=%d, zonemd=%s, zone_shard_weights=%s',
             id,
             directory,
             file_extension,
@@ -179,7 +1225,38 @@ class ZoneFileProvider(RfcPopulate, BaseProvider):
             expire,
             nxdomain,
             read_existing,
+            directory_layout,
+            directory_depth,
+            fast_load,
+            watch,
+            lazy_existing,
+            content_digest,
+            profile_directory,
+            compact,
+            shards,
+            compression,
+            notify,
+            notify_port,
+            reload_command,
+            notify_workers,
+            notify_timeout,
+            zone_shard_index,
+            zone_shard_count,
+            zonemd,
+            zone_shard_weights,
         )
+        if directory_layout not in self.DIRECTORY_LAYOUTS:
+            raise ZoneFileSourceException(
+                f'Unsupported directory_layout {directory_layout}, must be one of {", ".join(self.DIRECTORY_LAYOUTS)}'
+            )
+        if compression is not None and compression not in self.COMPRESSIONS:
+            raise ZoneFileSourceException(
+                f'Unsupported compression {compression}, must be one of {", ".join(self.COMPRESSIONS)}'
+            )
+        if not 0 <= zone_shard_index < zone_shard_count:
+            raise ZoneFileSourceException(
+                f'Invalid zone_shard_index {zone_shard_index}, must be from 0 to zone_shard_count - 1'
+            )
         super().__init__(id, *args, **kwargs)
         self.directory = directory
         self.file_extension = file_extension
@@ -191,16 +1268,234 @@ class ZoneFileProvider(RfcPopulate, BaseProvider):
         self.expire = expire
         self.nxdomain = nxdomain
         self.read_existing = read_existing
+        self.directory_layout = directory_layout
+        self.directory_depth = (
+            0 if directory_layout == 'flat' else int(directory_depth)
+        )
+
+        self.fast_load = fast_load
+
+        self.lazy_existing = lazy_existing
+        self.content_digest = content_digest
+        self.compact = compact
+        self.shards = int(shards)
+        self.compression = compression
+        self._compression_extension = self.COMPRESSIONS.get(compression, '')
+        self.notify = notify
+        self.notify_port = notify_port
+        self.reload_command = reload_command
+        self.notify_workers = notify_workers
+        self.notify_timeout = notify_timeout
+        self._notifier = None
+        self._notifier_lock = Lock()
+        self._shard_loader_pool = None
+        self._shard_loader_lock = Lock()
+        self._notifications = []
+        self.zone_shard_index = zone_shard_index
+        self.zone_shard_count = zone_shard_count
+        self.zone_shard_weights = zone_shard_weights
+        self._zone_shard_assignments = None
+        self.zonemd = zonemd
+        if profile_directory is not None:
+            self._profiler = _Profiler(profile_directory)
 
         self._zone_records = {}
+        self._lazy_nodes = {}
+        self._watcher = self._zone_file_watcher() if watch else None
+
+    def __getstate__(self):
+        # the notifier's threads, the shard loader's processes, the watcher's
+        # ctypes buffers, and the profiler's samplers can't be shipped off to
+        # worker processes
+        state = self.__dict__.copy()
+        state['_notifier'] = None
+        state['_notifier_lock'] = None
+        state['_shard_loader_pool'] = None
+        state['_shard_loader_lock'] = None
+        state['_notifications'] = []
+        state['_watcher'] = None
+        state.pop('_profiler', None)
+        # workers only apply, shipping every zone's cached records off with
+        # each plan would cost more than the batch saves
+        state['_zone_records'] = {}
+        state['_lazy_nodes'] = {}
+        state['_zone_shard_assignments'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._notifier_lock = Lock()
+        self._shard_loader_lock = Lock()
+
+    def _zone_file_watcher(self):
+        try:
+            return _InotifyZoneFileWatcher(self)
+        except (AttributeError, OSError) as err:
+            self.log.info(
+                '_zone_file_watcher: inotify unavailable, polling: %s', err
+            )
+            return _PollingZoneFileWatcher(self)
+
+    def dirty_zones(self):
+        '''
+        Returns an iterator over the names of the zones whose files have been
+        created, modified, or removed since the last call, or since the
+        provider was created, and drops their cached records so that the next
+        populate re-reads them. Requires `watch`.
+        '''
+        if self._watcher is None:
+            raise ZoneFileSourceException('dirty_zones requires watch: true')
+
+        paths = self._watcher.changed()
+        if paths is None:
+            # the watcher lost track of things, everything may have changed
+            dirty = set(self._zone_records) | set(self.list_zones())
+        else:
+            # map back to the names we've cached things under, they can differ
+            # from what's derived from the filename, e.g. RFC 2317 zones
+            cached = {self._zone_path(n): n for n in self._zone_records}
+            dirty = set()
+            for path in paths:
+                filename = _uncompressed(split(path)[1])
+                path = join(dirname(path), filename)
+                if path in cached:
+                    dirty.add(cached[path])
+                elif filename.endswith(self.file_extension):
+                    dirty.add(self._zone_name(filename))
+
+        for zone_name in dirty:
+            self._zone_records.pop(zone_name, None)
+        self.log.debug('dirty_zones: found %d dirty zones', len(dirty))
+
+        return iter(sorted(dirty))
+
+    def _zone_path(self, zone_name):
+        base = zone_name[:-1].replace('/', '-')
+        if self.directory_layout == 'hashed':
+            key = sha256(base.encode()).hexdigest()
+        else:
+            key = base
+        subdirs = [key[:i] for i in range(1, self.directory_depth + 1)]
+        return join(self.directory, *subdirs, f'{base}{self.file_extension}')
+
+    def _zone_file_path(self, zone_name):
+        # where the zone's file is written
+        return f'{self._zone_path(zone_name)}{self._compression_extension}'
+
+    def _find_zone_file(self, zone_name):
+        # the zone's file, compressed or not, preferring the configured
+        # compression if there happens to be more than one
+        path = self._zone_path(zone_name)
+        for ext in (self._compression_extension, '', *_ZONE_FILE_OPENERS):
+            if isfile(f'{path}{ext}'):
+                return f'{path}{ext}'
+        return None
+
+    def _zone_directories(self):
+        directories = [self.directory]
+        for _ in range(self.directory_depth):
+            directories = [
+                join(directory, subdir)
+                for directory in directories
+                for subdir in sorted(listdir(directory))
+                if isdir(join(directory, subdir))
+            ]
+        return directories
+
+    def _zone_name(self, filename):
+        filename = _uncompressed(filename)
+        n = len(self.file_extension)
+        if n > 0:
+            filename = filename[:-n]
+        return f'{filename}.'
+
+    def _zone_shard_weights(self):
+        # every worker has to agree on the weights, so they come from a file
+        # that's only ever written once, by whoever needs it first
+        path = self.zone_shard_weights
+        if path is None:
+            return {}
+        if not exists(path):
+            weights = {}
+            for directory in self._zone_directories():
+                for filename in listdir(directory):
+                    if _uncompressed(filename).endswith(self.file_extension):
+                        st = stat(join(directory, filename))
+                        weights[self._zone_name(filename)] = st.st_size
+            tmp = f'{path}.{getpid()}.{get_ident()}.tmp'
+            with open(tmp, 'w') as fh:
+                json.dump(weights, fh, sort_keys=True)
+            try:
+                # unlike replace this won't clobber what someone else wrote
+                link(tmp, path)
+                self.log.info(
+                    '_zone_shard_weights: wrote %d weights to %s',
+                    len(weights),
+                    path,
+                )
+            except FileExistsError:
+                pass
+            finally:
+                remove(tmp)
+        with open(path) as fh:
+            return json.load(fh)
+
+    def _in_zone_shard(self, zone_name):
+        if self.zone_shard_count == 1:
+            return True
+        if self._zone_shard_assignments is None:
+            self._zone_shard_assignments = _assign_shards(
+                self._zone_shard_weights(), self.zone_shard_count
+            )
+        try:
+            shard = self._zone_shard_assignments[zone_name]
+        except KeyError:
+            # no weight, it goes wherever it likes best
+            shard = _rendezvous(zone_name, self.zone_shard_count)[0]
+        return shard == self.zone_shard_index
 
     def list_zones(self):
-        n = len(self.file_extension)
+        # what's there may have changed since we last looked
+        self._zone_shard_assignments = None
+        for directory in self._zone_directories():
+            # a zone only shows up once, compressed or not
+            for filename in sorted(
+                {_uncompressed(f) for f in listdir(directory)}
+            ):
+                if filename.endswith(self.file_extension):
+                    zone_name = self._zone_name(filename)
+                    if self._in_zone_shard(zone_name):
+                        yield zone_name
+
+    def migrate_directory(self):
+        '''
+        Moves zone files sitting directly in `directory`, e.g. ones written
+        before `directory_layout` was configured, to their place in the
+        configured layout. Returns the names of the zones that were moved.
+        '''
+        moved = []
         for filename in sorted(listdir(self.directory)):
-            if filename.endswith(self.file_extension):
-                if n > 0:
-                    filename = filename[:-n]
-                yield f'{filename}.'
+            path = join(self.directory, filename)
+            base = _uncompressed(filename)
+            if not base.endswith(self.file_extension) or not isfile(path):
+                continue
+            zone_name = self._zone_name(filename)
+            # keep whatever compression the file has
+            dest = f'{self._zone_path(zone_name)}{filename[len(base):]}'
+            if dest == path:
+                # flat layout, it's already where it belongs
+                continue
+            makedirs(dirname(dest), exist_ok=True)
+            replace(path, dest)
+            # its shards are included relative to it and go along with it
+            shards = f'{path}{_ZONE_FILE_SHARDS_SUFFIX}'
+            if isdir(shards):
+                replace(shards, f'{dest}{_ZONE_FILE_SHARDS_SUFFIX}')
+            moved.append(zone_name)
+
+        self.log.info('migrate_directory: moved %d zone files', len(moved))
+
+        return moved
 
     def _load_zone_file(self, zone_name, target):
         if target and not self.read_existing:
@@ -208,10 +1503,36 @@ class ZoneFileProvider(RfcPopulate, BaseProvider):
             # everything every time, similar to YamlProvider
             return None
 
-        zone_filename = f'{zone_name[:-1]}{self.file_extension}'
-        zonefiles = listdir(self.directory)
-        path = join(self.directory, zone_filename)
-        if zone_filename in zonefiles:
+        path = self._find_zone_file(zone_name)
+        if path is not None:
+            # sharded zone files are read whatever shards is set to here
+            if path != self._zone_path(zone_name):
+                # compressed, decompress it all and parse that
+                with _open_zone_file(path) as fh:
+                    buf = fh.read()
+                sharded = _split_shards(split(path)[1], buf)
+                if sharded is not None:
+                    return self._load_sharded_zone_file(
+                        path, zone_name, *sharded
+                    )
+                return _load_zone_buf(
+                    buf, zone_name, self.check_origin, self.fast_load
+                )
+            if self._has_includes(path):
+                with open(path, 'rb') as fh:
+                    sharded = _split_shards(split(path)[1], fh.read())
+                if sharded is not None:
+                    return self._load_sharded_zone_file(
+                        path, zone_name, *sharded
+                    )
+            if self.fast_load:
+                rdatas = self._fast_load_zone_file(path, zone_name)
+                if rdatas is not None:
+                    return rdatas
+                self.log.debug(
+                    '_load_zone_file: zone=%s, falling back to dnspython',
+                    zone_name,
+                )
             try:
                 z = dns.zone.from_file(
                     path,
@@ -228,9 +1549,66 @@ class ZoneFileProvider(RfcPopulate, BaseProvider):
             # file when used as a target.
             return None
         else:
-            raise ZoneFileSourceNotFound(path)
+            raise ZoneFileSourceNotFound(self._zone_path(zone_name))
+
+        return [
+            (name.to_text(), ttl, dns.rdatatype.to_text(rdata.rdtype), rdata)
+            for name, ttl, rdata in z.iterate_rdatas()
+        ]
+
+    def _has_includes(self, path):
+        with open(path, 'rb') as fh:
+            try:
+                buf = mmap(fh.fileno(), 0, access=ACCESS_READ)
+            except ValueError:
+                # empty, nothing to include
+                return False
+            with buf:
+                # a quick look for the literal first, it's almost never there
+                return (
+                    buf.find(b'$INCLUDE') != -1
+                    and _ZONE_FILE_INCLUDE_RE.search(buf) is not None
+                )
 
-        return z
+    def _shard_loader(self):
+        # one pool shared by every sharded load, created when first needed
+        with self._shard_loader_lock:
+            if self._shard_loader_pool is None:
+                self._shard_loader_pool = ProcessPoolExecutor()
+            return self._shard_loader_pool
+
+    def _load_sharded_zone_file(self, path, zone_name, buf, includes):
+        directory = dirname(path)
+        includes = [join(directory, include) for include in includes]
+        rdatas = _load_zone_buf(
+            buf, zone_name, self.check_origin, self.fast_load
+        )
+        self.log.debug(
+            '_load_sharded_zone_file: zone=%s, shards=%d',
+            zone_name,
+            len(includes),
+        )
+        for shard in self._shard_loader().map(
+            _load_zone_shard,
+            includes,
+            repeat(zone_name),
+            repeat(self.fast_load),
+        ):
+            rdatas.extend(shard)
+        return rdatas
+
+    def _fast_load_zone_file(self, path, zone_name):
+        with open(path, 'rb') as fh:
+            try:
+                buf = mmap(fh.fileno(), 0, access=ACCESS_READ)
+            except ValueError:
+                # empty files can't be mapped, leave them to dnspython
+                return None
+            with buf:
+                try:
+                    return _parse_zone_file(buf, zone_name, self.check_origin)
+                except _ZoneFileUnsupported:
+                    return None
 
     def zone_exists(self, zone, target=False):
         if target and not self.read_existing:
@@ -238,25 +1616,41 @@ class ZoneFileProvider(RfcPopulate, BaseProvider):
             # create a completely new copy
             return False
 
-        zone_filename = f'{zone.name[:-1]}{self.file_extension}'
-        return exists(join(self.directory, zone_filename))
+        return self._find_zone_file(zone.name) is not None
 
     def zone_records(self, zone, target):
-        if zone.name not in self._zone_records:
-            z = self._load_zone_file(zone.name, target)
+        # as a target the zones come from elsewhere and are written wherever
+        if not target and not self._in_zone_shard(zone.name):
+            raise ZoneFileSourceException(
+                f'{zone.decoded_name} is not in zone_shard_index {self.zone_shard_index} of {self.zone_shard_count}'
+            )
+        records = self._zone_records.get(zone.name)
+        if records is None:
+            records = self._single_flight.do(
+                zone.name, self._load_zone_records, zone, target
+            )
+        return records
 
-            records = []
-            if z:
-                for name, ttl, rdata in z.iterate_rdatas():
-                    rdtype = dns.rdatatype.to_text(rdata.rdtype)
-                    if rdtype in self.SUPPORTS:
-                        records.append(
-                            Rr(name.to_text(), rdtype, ttl, rdata.to_text())
-                        )
+    def _load_zone_records(self, zone, target):
+        # another thread may have finished loading it since we last looked
+        records = self._zone_records.get(zone.name)
+        if records is not None:
+            return records
 
-            self._zone_records[zone.name] = records
+        with self._profile(zone.name, 'load'):
+            rdatas = self._load_zone_file(zone.name, target)
 
-        return self._zone_records[zone.name]
+        records = []
+        if rdatas:
+            with self._profile(zone.name, 'to_text'):
+                for name, ttl, rdtype, rdata in rdatas:
+                    if rdtype in self.SUPPORTS:
+                        # rdata is text when it came from the fast loader,
+                        # str of a dnspython Rdata is its to_text
+                        records.append(Rr(name, rdtype, ttl, str(rdata)))
+
+        self._zone_records[zone.name] = records
+        return records
 
     def _primary_nameserver(self, decoded_name, records):
         for record in records:
@@ -278,10 +1672,7 @@ class ZoneFileProvider(RfcPopulate, BaseProvider):
         return f'{pieces[0]}.{decoded_name}'
 
     def _longest_name(self, records):
-        try:
-            return sorted(len(r.name) for r in records)[-1]
-        except IndexError:
-            return 0
+        return max((len(r.name) for r in records), default=0)
 
     def _now(self):
         return datetime.now(UTC)
@@ -290,86 +1681,369 @@ class ZoneFileProvider(RfcPopulate, BaseProvider):
         # things wrap/reset at max int
         return int(self._now().timestamp()) % 2147483647
 
-    def _apply(self, plan):
-        desired = plan.desired
-
-        if not isdir(self.directory):
-            makedirs(self.directory)
-
-        # make a copy of existing we can muck with
-        copy = plan.existing.copy()
-        changes = plan.changes
-        self.log.debug(
-            '_apply: zone=%s, len(changes)=%d', copy.decoded_name, len(changes)
+    def _digest(self, name, records):
+        # covers everything that goes into the zone file other than the serial
+        soa = (
+            self._primary_nameserver(name, records),
+            self._hostmaster_email(name),
+            self.default_ttl,
+            self.refresh,
+            self.retry,
+            self.expire,
+            self.nxdomain,
         )
+        # as do the settings that change how the zone file is written
+        settings = (self.compact, self.zonemd, self.shards)
+        h = sha256()
+        h.update(f'{name} {soa} {settings}\n'.encode())
+        for record in records:
+            fqdn, ttl, _type, rdatas = record.rrs
+            for rdata in rdatas:
+                h.update(f'{fqdn} {ttl} {_type} {rdata}\n'.encode())
+        return h.hexdigest()
+
+    def _read_digest(self, filename):
+        # only the first line of the file needs to be read
+        prefix = self.DIGEST_PREFIX
+        try:
+            with _open_zone_file(filename) as fh:
+                line = fh.read(len(prefix) + 64)
+        except FileNotFoundError:
+            return None
+        if not line.startswith(prefix):
+            return None
+        return line[len(prefix) :].decode()
 
-        # apply our pending changes to that copy
-        copy.apply(changes)
-
-        records = sorted(copy.records)
-        longest_name = self._longest_name(records)
+    def _common_ttl(self, records):
+        # the TTL used by the most RRs
+        ttls = Counter()
+        for record in records:
+            try:
+                ttls[record.ttl] += len(record.values)
+            except AttributeError:
+                ttls[record.ttl] += 1
+        return ttls.most_common(1)[0][0] if ttls else self.default_ttl
 
-        name = desired.name
-        filename = join(
-            self.directory,
-            f'{name[:-1].replace("/", "-")}{self.file_extension}',
-        )
-        with open(filename, 'w') as fh:
-            fh.write(f'$ORIGIN {name}\n\n')
-            utf8_name = desired.decoded_name
-            if name != utf8_name:
-                fh.write(f'; Zone name: {utf8_name}\n')
-            template = Template(
-                '''@ $default_ttl IN SOA $primary_nameserver $hostmaster_email (
+    def _render_header(
+        self,
+        name,
+        decoded_name,
+        records,
+        digest=None,
+        default_ttl=None,
+        zonemd=None,
+        primary_nameserver=None,
+    ):
+        header = f'$ORIGIN {name}\n\n'
+        if default_ttl is not None:
+            header = f'$ORIGIN {name}\n$TTL {default_ttl}\n\n'
+        if digest is not None:
+            header = f'{self.DIGEST_PREFIX.decode()}{digest}\n{header}'
+        if name != decoded_name:
+            header += f'; Zone name: {decoded_name}\n'
+        template = Template(
+            '''@ $default_ttl IN SOA $primary_nameserver $hostmaster_email (
     $serial ; Serial
     $refresh ; Refresh
     $retry ; Retry
     $expire ; Expire
     $nxdomain ; NXDOMAIN ttl
 )
-
+$zonemd
 '''
-            )
+        )
 
+        if primary_nameserver is None:
             primary_nameserver = self._primary_nameserver(name, records)
-            fh.write(
-                template.substitute(
-                    {
-                        'hostmaster_email': self._hostmaster_email(name),
-                        'serial': self._serial(),
-                        'zone_name': name,
-                        'default_ttl': self.default_ttl,
-                        'primary_nameserver': primary_nameserver,
-                        'refresh': self.refresh,
-                        'retry': self.retry,
-                        'expire': self.expire,
-                        'nxdomain': self.nxdomain,
-                    }
+        if zonemd is None:
+            serial = self._serial()
+            zonemd = ''
+        else:
+            serial, zonemd = zonemd
+            zonemd = f'@ {self.default_ttl} IN ZONEMD {zonemd}\n'
+        return header + template.substitute(
+            {
+                'hostmaster_email': self._hostmaster_email(name),
+                'serial': serial,
+                'zonemd': zonemd,
+                'zone_name': name,
+                'default_ttl': self.default_ttl,
+                'primary_nameserver': primary_nameserver,
+                'refresh': self.refresh,
+                'retry': self.retry,
+                'expire': self.expire,
+                'nxdomain': self.nxdomain,
+            }
+        )
+
+    def _render_records(self, records, default_ttl=None):
+        '''
+        Renders records as zone file lines. With default_ttl they're compact,
+        without any padding and leaving out the TTLs that match it.
+        '''
+        compact = default_ttl is not None
+        longest_name = 0 if compact else self._longest_name(records)
+        blank = ' ' * longest_name
+        chunk_size = self.RENDER_CHUNK_SIZE
+
+        lines = []
+        append = lines.append
+        prev_name = None
+        for record in records:
+            values = _rdata_texts(record)
+            if not values:
+                continue
+
+            _type = record._type
+
+            # everything but the owner name is shared by all of the record's
+            # values, so the column layout is only computed once per record
+            if not compact:
+                rest = f' {record.ttl:8d} IN {_type:<8} '
+            elif record.ttl == default_ttl:
+                rest = f' IN {_type} '
+            else:
+                rest = f' {record.ttl} IN {_type} '
+            name = record.name or '@'
+            if name == prev_name:
+                first = blank + rest
+            else:
+                prev_name = name
+                if name != record.decoded_name:
+                    # idna encoded, add a comment with the utf8 version
+                    append(f'; Name: {record.decoded_fqdn}')
+                first = name.ljust(longest_name) + rest
+            rest = blank + rest
+
+            append(first + values[0])
+            for value in values[1:]:
+                append(rest + value)
+
+            if len(lines) >= chunk_size:
+                yield '\n'.join(lines) + '\n'
+                lines.clear()
+
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+    def _zonemd(self, name, records):
+        '''
+        Returns the serial to use along with the ZONEMD over records and the
+        SOA with that serial.
+        '''
+        serial = self._serial()
+        soa = (
+            f'{self._primary_nameserver(name, records)} '
+            f'{self._hostmaster_email(name)} {serial} {self.refresh} '
+            f'{self.retry} {self.expire} {self.nxdomain}'
+        )
+        rrsets = [(name, self.default_ttl, 'SOA', [soa])]
+        for record in records:
+            rrsets.append(
+                (record.fqdn, record.ttl, record._type, _rdata_texts(record))
+            )
+        return serial, _compute_zonemd(name, rrsets).to_text()
+
+    def _render(self, name, decoded_name, records, digest=None, zonemd=None):
+        '''
+        Generates the contents of the zone file for `records` in chunks
+        suitable for writing out to a file handle
+        '''
+        default_ttl = self._common_ttl(records) if self.compact else None
+        yield self._render_header(
+            name, decoded_name, records, digest, default_ttl, zonemd
+        )
+        yield from self._render_records(records, default_ttl)
+
+    def _write_zone_file(self, filename, chunks):
+        # streams through the compressor when there is one
+        opener = _ZONE_FILE_OPENERS.get(self._compression_extension, open)
+        _write_atomic(filename, chunks, mode='wt', opener=opener)
+
+    def _notify_zone(self, zone_name):
+        if not self.notify and not self.reload_command:
+            return
+        with self._notifier_lock:
+            if self._notifier is None:
+                self._notifier = ThreadPoolExecutor(
+                    max_workers=self.notify_workers, thread_name_prefix='notify'
+                )
+            for server in self.notify:
+                self._notifications.append(
+                    self._notifier.submit(self._send_notify, zone_name, server)
+                )
+            if self.reload_command:
+                self._notifications.append(
+                    self._notifier.submit(self._reload_zone, zone_name)
                 )
+
+    def _send_notify(self, zone_name, server):
+        query = dns.message.make_query(zone_name, dns.rdatatype.SOA)
+        # the opcode lives in flags so they need to be set first
+        query.flags = dns.flags.AA
+        query.set_opcode(dns.opcode.NOTIFY)
+        try:
+            response = dns.query.udp(
+                query,
+                server,
+                port=self.notify_port,
+                timeout=self.notify_timeout,
+            )
+        except (DNSException, OSError) as err:
+            self.log.warning(
+                '_send_notify: zone=%s, server=%s, failed: %s',
+                zone_name,
+                server,
+                err,
+            )
+            return zone_name, server, False
+        rcode = response.rcode()
+        if rcode != dns.rcode.NOERROR:
+            self.log.warning(
+                '_send_notify: zone=%s, server=%s, failed: %s',
+                zone_name,
+                server,
+                dns.rcode.to_text(rcode),
             )
+            return zone_name, server, False
+        self.log.info('_send_notify: zone=%s, server=%s', zone_name, server)
+        return zone_name, server, True
+
+    def _reload_zone(self, zone_name):
+        command = [
+            Template(arg).safe_substitute(zone=zone_name)
+            for arg in self.reload_command
+        ]
+        try:
+            run(
+                command,
+                check=True,
+                capture_output=True,
+                timeout=self.notify_timeout,
+            )
+        except (OSError, SubprocessError) as err:
+            self.log.warning(
+                '_reload_zone: zone=%s, failed: %s', zone_name, err
+            )
+            return zone_name, 'reload', False
+        self.log.info('_reload_zone: zone=%s', zone_name)
+        return zone_name, 'reload', True
+
+    def wait_notifications(self):
+        '''
+        Waits for any notifies and reloads that are still in flight and
+        returns a list of (zone name, server or 'reload', succeeded) for
+        everything sent since the last call.
+        '''
+        with self._notifier_lock:
+            notifications, self._notifications = self._notifications, []
+        return [future.result() for future in notifications]
+
+    def _shard(self, name):
+        return int(sha256(name.encode()).hexdigest()[:8], 16) % self.shards
+
+    def _write_sharded(
+        self, filename, name, decoded_name, records, digest, zonemd
+    ):
+        # the apex stays in the main file along with the SOA, everything else
+        # is spread over the shards by its name so nodes are never split up
+        apex = []
+        shards = [[] for _ in range(self.shards)]
+        for record in records:
+            if record.name:
+                shards[self._shard(record.name)].append(record)
+            else:
+                apex.append(record)
+
+        directory = f'{filename}{_ZONE_FILE_SHARDS_SUFFIX}'
+        makedirs(directory, exist_ok=True)
+        shard_filenames = []
+        written = 0
+        for i, shard in enumerate(shards):
+            shard_filename = f'{i:04d}{self._compression_extension}'
+            shard_filenames.append(shard_filename)
+            default_ttl = self._common_ttl(shard) if self.compact else None
+            body = f'$ORIGIN {name}\n'
+            if default_ttl is not None:
+                body += f'$TTL {default_ttl}\n'
+            body += ''.join(self._render_records(shard, default_ttl))
+            # only rewrite the shards that have changed
+            shard_digest = sha256(body.encode()).hexdigest()
+            path = join(directory, shard_filename)
+            if shard_digest != self._read_digest(path):
+                prefix = self.DIGEST_PREFIX.decode()
+                self._write_zone_file(path, (f'{prefix}{shard_digest}\n', body))
+                written += 1
+
+        # clean up any leftovers from when there were more shards
+        for shard_filename in listdir(directory):
+            if shard_filename not in shard_filenames:
+                remove(join(directory, shard_filename))
+
+        includes = [
+            f'$INCLUDE {split(directory)[1]}/{f}\n' for f in shard_filenames
+        ]
+        self._write_zone_file(
+            filename,
+            chain(
+                self._render(name, decoded_name, apex, digest, zonemd), includes
+            ),
+        )
+        self.log.debug(
+            '_write_sharded: zone=%s, wrote %d of %d shards',
+            name,
+            written,
+            self.shards,
+        )
 
-            prev_name = None
-            for record in records:
-                try:
-                    values = record.values
-                except AttributeError:
-                    values = [record.value]
-                for value in values:
-                    name = '@' if record.name == '' else record.name
-                    if name == prev_name:
-                        name = ''
-                    else:
-                        prev_name = name
-                        if name != record.decoded_name:
-                            # idna encoded, add a comment with the utf8 version
-                            fh.write(f'; Name: {record.decoded_fqdn}\n')
-                    value = value.rdata_text
-                    if record._type in ('SPF', 'TXT'):
-                        # TXT values need to be quoted and split if longer than 255 characters
-                        value = record.chunked_value(value)
-                    fh.write(
-                        f'{name:<{longest_name}} {record.ttl:8d} IN {record._type:<8} {value}\n'
-                    )
+    def _apply(self, plan):
+        desired = plan.desired
+        changes = plan.changes
+        self.log.debug(
+            '_apply: zone=%s, len(changes)=%d',
+            desired.decoded_name,
+            len(changes),
+        )
+
+        # what's there now with our pending changes applied, not necessarily
+        # desired as changes may have been filtered
+        with self._profile(desired.name, 'apply_changes'):
+            records = _apply_changes(plan.existing.records, changes)
+
+        name = desired.name
+        filename = self._zone_file_path(name)
+        digest = None
+        if self.content_digest:
+            digest = self._digest(name, records)
+            if digest == self._read_digest(filename):
+                self.log.info(
+                    '_apply: zone=%s, contents unchanged, not writing', name
+                )
+                return True
+        makedirs(dirname(filename), exist_ok=True)
+        # covers everything, even when the records are spread across shards
+        zonemd = self._zonemd(name, records) if self.zonemd else None
+        with self._profile(name, 'write'):
+            if self.shards:
+                self._write_sharded(
+                    filename,
+                    name,
+                    desired.decoded_name,
+                    records,
+                    digest,
+                    zonemd,
+                )
+            else:
+                self._write_zone_file(
+                    filename,
+                    self._render(
+                        name, desired.decoded_name, records, digest, zonemd
+                    ),
+                )
+        self._notify_zone(name)
+        self._remove_stale(name, filename)
+        # anything we've cached for the zone is now out of date
+        self._zone_records.pop(name, None)
 
         self.log.debug(
             '_apply: zone=%s, num_records=%d', name, len(plan.changes)
@@ -377,6 +2051,135 @@ class ZoneFileProvider(RfcPopulate, BaseProvider):
 
         return True
 
+    def plan(self, desired, processors=[], *args, **kwargs):
+        if self.content_digest and self.read_existing and not processors:
+            # if what's on disk already matches what's desired there's no need
+            # to read it in and work out that nothing has changed
+            processed = self._process_desired_zone(desired.copy())
+            digest = self._digest(desired.name, sorted(processed.records))
+            if digest == self._read_digest(self._zone_file_path(desired.name)):
+                self.log.info(
+                    'plan: desired=%s, digest unchanged', desired.decoded_name
+                )
+                return None
+
+        return super().plan(desired, processors, *args, **kwargs)
+
+    def _remove_stale(self, zone_name, filename):
+        # clean up copies from before compression was changed
+        for ext in ('', *_ZONE_FILE_OPENERS):
+            stale = f'{self._zone_path(zone_name)}{ext}'
+            if stale != filename and exists(stale):
+                remove(stale)
+
+    def mirror(self, source, zone_names=None):
+        '''
+        Copies zones from source, e.g. an AxfrSource or another
+        ZoneFileProvider, straight into zone files without going through
+        octoDNS Records, plans, or validation. Only the types in SUPPORTS are
+        kept and names are lowercased. zone_names defaults to everything
+        source.list_zones returns.
+
+        Zone files are written whole, compressed as configured, but shards,
+        compact, zonemd, and content_digest are ignored. The next apply of a
+        zone writes it as they say.
+
+        Returns a dict mapping each zone name to the number of RRs that were
+        written or the exception that was raised mirroring it.
+        '''
+        return _mirror(self, source, zone_names)
+
+    def _mirror_zone(self, zone, rrsets):
+        name = zone.name
+        apex_ns = rrsets.get((name, 'NS'))
+        # without one _render_header will warn and use a placeholder
+        primary_nameserver = apex_ns[1][0] if apex_ns else None
+
+        def render():
+            yield self._render_header(
+                name,
+                zone.decoded_name,
+                [],
+                primary_nameserver=primary_nameserver,
+            )
+            suffix = len(name) + 1
+            lines = []
+            for (fqdn, _type), (ttl, rdatas) in sorted(rrsets.items()):
+                owner = '@' if fqdn == name else fqdn[:-suffix]
+                for rdata in rdatas:
+                    lines.append(f'{owner} {ttl} IN {_type} {rdata}\n')
+                if len(lines) >= self.RENDER_CHUNK_SIZE:
+                    yield ''.join(lines)
+                    lines.clear()
+            yield ''.join(lines)
+
+        filename = self._zone_file_path(name)
+        makedirs(dirname(filename), exist_ok=True)
+        self._write_zone_file(filename, render())
+        self._remove_stale(name, filename)
+        self._zone_records.pop(name, None)
+        self._notify_zone(name)
+
+        num_rrs = sum(len(rdatas) for _, rdatas in rrsets.values())
+        self.log.debug('_mirror_zone: zone=%s, num_rrs=%d', name, num_rrs)
+        return num_rrs
+
+    def apply_batch(self, plans, max_workers=None):
+        '''
+        Applies many plans at once, rendering and writing their zone files on
+        a pool of `max_workers` processes, defaulting to one per CPU.
+
+        Failures are isolated to the zone they happened in, the rest of the
+        batch carries on. Returns a dict mapping each zone name to either the
+        number of changes that were applied or the exception that was raised
+        while applying it.
+        '''
+        # max_workers=1 runs everything in-process, which avoids the overhead
+        # of spinning up and shipping plans to worker processes for tiny
+        # batches
+        executor_class = (
+            ThreadPoolExecutor if max_workers == 1 else ProcessPoolExecutor
+        )
+        with executor_class(max_workers=max_workers) as executor:
+            futures = {
+                plan.desired.name: executor.submit(_apply_plan, self, plan)
+                for plan in plans
+            }
+
+        # workers apply to copies of the provider, anything they read before
+        # the files changed needs dropping here too
+        for zone_name in futures:
+            self._zone_records.pop(zone_name, None)
+
+        results = {}
+        failed = 0
+        for zone_name, future in futures.items():
+            try:
+                results[zone_name] = future.result()
+            except Exception as err:
+                self.log.error(
+                    'apply_batch: zone=%s, failed: %s', zone_name, err
+                )
+                results[zone_name] = err
+                failed += 1
+
+        self.log.info(
+            'apply_batch: applied %d zones, %d failed',
+            len(results) - failed,
+            failed,
+        )
+
+        return results
+
+
+def _apply_plan(provider, plan):
+    # module level so that it can be pickled and shipped off to worker
+    # processes by ZoneFileProvider.apply_batch, anything sent from a worker
+    # needs to be finished before it goes away
+    ret = provider.apply(plan)
+    provider.wait_notifications()
+    return ret
+
 
 ZoneFileSource = ZoneFileProvider
 
@@ -388,6 +2191,58 @@ class AxfrSourceException(Exception):
 class AxfrSourceZoneTransferFailed(AxfrSourceException):
     def __init__(self, err):
         super().__init__(f'Unable to Perform Zone Transfer: {err}')
+        # set when the server answered with an error, e.g. REFUSED
+        self.rcode = getattr(err, 'rcode', None)
+
+
+def _soa_serial(response):
+    if response.rcode() == dns.rcode.NOERROR:
+        for rrset in response.answer:
+            if rrset.rdtype == dns.rdatatype.SOA:
+                return rrset[0].serial
+    return None
+
+
+# (host, port) -> (max_transfers, the BoundedSemaphore limiting the transfers
+# in flight from that server), shared by every provider talking to it
+_TRANSFER_LIMITS = {}
+# (host, port, max_transfers) that have been warned about being over the limit
+_TRANSFER_LIMITS_WARNED = set()
+_TRANSFER_LIMITS_LOCK = Lock()
+
+
+def _transfer_limit(host, port, max_transfers, log):
+    # the smallest max_transfers of the providers talking to a server wins,
+    # transfers already holding a larger limit finish under it
+    with _TRANSFER_LIMITS_LOCK:
+        key = (host, port)
+        limit = _TRANSFER_LIMITS.get(key)
+        if limit is not None and max_transfers < limit[0]:
+            log.warning(
+                '_transfer_limit: host=%s, port=%d, lowering max_transfers from %d to %d',
+                host,
+                port,
+                limit[0],
+                max_transfers,
+            )
+            limit = None
+        if limit is None:
+            limit = _TRANSFER_LIMITS[key] = (
+                max_transfers,
+                BoundedSemaphore(max_transfers),
+            )
+        elif max_transfers > limit[0]:
+            warned = (host, port, max_transfers)
+            if warned not in _TRANSFER_LIMITS_WARNED:
+                _TRANSFER_LIMITS_WARNED.add(warned)
+                log.warning(
+                    '_transfer_limit: host=%s, port=%d, max_transfers=%d, another provider limits it to %d',
+                    host,
+                    port,
+                    max_transfers,
+                    limit[0],
+                )
+        return limit[1]
 
 
 class AxfrPopulate(RfcPopulate):
@@ -402,12 +2257,16 @@ class AxfrPopulate(RfcPopulate):
         key_secret=None,
         key_algorithm=None,
         update_batch_size=1000,
+        catalog_zone=None,
+        max_transfers=4,
+        transfer_retries=3,
+        transfer_backoff=1.0,
         *args,
         **kwargs,
     ):
         self.log = getLogger(f'{self.__class__.__name__}[{id}]')
         self.log.debug(
-            '__init__: id=%s, host=%s, port=%d, ipv6=%s, timeout=%d, key_name=%s, key_secret=%s, key_algorithm=%s',
+            '__init__: id=%s, host=%s, port=%d, ipv6=%s, timeout=%d, key_name=%s, key_secret=%s, key_algorithm=%s, catalog_zone=%s, max_transfers=%d, transfer_retries=%d, transfer_backoff=%s',
             id,
             host,
             port,
@@ -416,6 +2275,10 @@ class AxfrPopulate(RfcPopulate):
             key_name,
             key_secret is not None,
             key_algorithm is not None,
+            catalog_zone,
+            max_transfers,
+            transfer_retries,
+            transfer_backoff,
         )
         super().__init__(id, *args, **kwargs)
         self.host = self._host(host, ipv6)
@@ -426,6 +2289,15 @@ class AxfrPopulate(RfcPopulate):
         self.key_secret = key_secret
         self.key_algorithm = key_algorithm
         self.update_batch_size = update_batch_size
+        self.catalog_zone = catalog_zone
+        self.max_transfers = int(max_transfers)
+        self.transfer_retries = int(transfer_retries)
+        self.transfer_backoff = float(transfer_backoff)
+
+        # zone name -> number of records, from their last transfer
+        self._transfer_sizes = {}
+        # (serial, member zones) from the last transfer of the catalog
+        self._catalog = None
 
     def _host(self, host, ipv6):
         h = host
@@ -454,11 +2326,225 @@ class AxfrPopulate(RfcPopulate):
             params['keyalgorithm'] = self.key_algorithm
         return params
 
+    def soa_serials(self, zone_names, sockets=4, window=512, timeout=2):
+        '''
+        Looks up the SOA serials of zone_names on host in bulk. Queries are
+        sent over UDP, up to window of them outstanding at once, spread over a
+        small number of sockets and matched up with their replies by query id.
+        Queries that time out or get truncated replies are retried over TCP.
+
+        Returns a dict mapping each of the zone names to its serial, or None if
+        it couldn't be found.
+        '''
+        self.log.debug(
+            'soa_serials: sockets=%d, window=%d, timeout=%f',
+            sockets,
+            window,
+            timeout,
+        )
+        af = dns.inet.af_for_address(self.host)
+        socks = [socket.socket(af, socket.SOCK_DGRAM) for _ in range(sockets)]
+        selector = DefaultSelector()
+        for sock in socks:
+            sock.setblocking(False)
+            selector.register(sock, EVENT_READ)
+
+        queue = deque(zone_names)
+        # (socket, query id) -> (zone name, query, expires)
+        pending = {}
+        retries = []
+        serials = {}
+        sent = 0
+        try:
+            while queue or pending:
+                while queue and len(pending) < window:
+                    zone_name = queue.popleft()
+                    sock = socks[sent % sockets]
+                    sent += 1
+                    query = dns.message.make_query(
+                        zone_name, dns.rdatatype.SOA, use_edns=0
+                    )
+                    # ids only need to be unique per socket
+                    while (sock, query.id) in pending:
+                        query.id = (query.id + 1) & 0xFFFF
+                    sock.sendto(query.to_wire(), (self.host, self.port))
+                    pending[(sock, query.id)] = (
+                        zone_name,
+                        query,
+                        monotonic() + timeout,
+                    )
+
+                wait = min(e for _, _, e in pending.values()) - monotonic()
+                for key, _ in selector.select(max(wait, 0)):
+                    sock = key.fileobj
+                    while True:
+                        try:
+                            wire = sock.recv(65535)
+                        except BlockingIOError:
+                            break
+                        try:
+                            response = dns.message.from_wire(wire)
+                        except DNSException:
+                            continue
+                        entry = pending.get((sock, response.id))
+                        if entry is None or not entry[1].is_response(response):
+                            # late, or not something we asked for
+                            continue
+                        del pending[(sock, response.id)]
+                        zone_name, query, _ = entry
+                        if response.flags & dns.flags.TC:
+                            retries.append((zone_name, query))
+                        else:
+                            serials[zone_name] = _soa_serial(response)
+
+                now = monotonic()
+                for key, (zone_name, query, expires) in list(pending.items()):
+                    if expires <= now:
+                        del pending[key]
+                        retries.append((zone_name, query))
+        finally:
+            selector.close()
+            for sock in socks:
+                sock.close()
+
+        self.log.debug('soa_serials: retrying %d over tcp', len(retries))
+        for zone_name, query in retries:
+            try:
+                response = dns.query.tcp(
+                    query, self.host, port=self.port, timeout=self.timeout
+                )
+            except (DNSException, OSError) as err:
+                self.log.warning(
+                    'soa_serials: zone=%s, failed: %s', zone_name, err
+                )
+                serials[zone_name] = None
+                continue
+            serials[zone_name] = _soa_serial(response)
+
+        return serials
+
+    def transfer_zones(self, zone_names):
+        '''
+        Transfers lots of zones from host, max_transfers at a time. The
+        biggest zones, going by how many records they had the last time they
+        were transferred, go first so they don't hold things up at the end.
+        Zones that haven't been seen before are assumed to be big.
+
+        Returns a dict mapping each zone name to its list of Rr, or the
+        exception that was raised transferring it.
+        '''
+        sizes = self._transfer_sizes
+        ordered = sorted(zone_names, key=lambda n: -sizes.get(n, inf))
+        self.log.debug(
+            'transfer_zones: zones=%d, max_transfers=%d',
+            len(ordered),
+            self.max_transfers,
+        )
+
+        def transfer(zone_name):
+            return self.zone_records(Zone(zone_name, []), target=False)
+
+        start = perf_counter()
+        # the executor hands work out in submission order
+        with ThreadPoolExecutor(max_workers=self.max_transfers) as executor:
+            futures = {n: executor.submit(transfer, n) for n in ordered}
+        elapsed = perf_counter() - start
+
+        results = {}
+        records = 0
+        failed = 0
+        for zone_name, future in futures.items():
+            try:
+                rrs = future.result()
+            except AxfrSourceZoneTransferFailed as err:
+                self.log.error(
+                    'transfer_zones: zone=%s, failed: %s', zone_name, err
+                )
+                results[zone_name] = err
+                failed += 1
+                continue
+            results[zone_name] = rrs
+            sizes[zone_name] = len(rrs)
+            records += len(rrs)
+
+        self.log.info(
+            'transfer_zones: transferred %d zones, %d failed, %d records in %.2fs, %.0f records/s',
+            len(results) - failed,
+            failed,
+            records,
+            elapsed,
+            records / elapsed if elapsed else 0,
+        )
+
+        return results
+
+    def list_zones(self):
+        if self.catalog_zone is None:
+            raise AxfrSourceException('list_zones requires catalog_zone')
+
+        catalog_zone = self.catalog_zone
+        serial = self.soa_serials([catalog_zone], sockets=1)[catalog_zone]
+        if (
+            serial is not None
+            and self._catalog is not None
+            and self._catalog[0] == serial
+        ):
+            self.log.debug('list_zones: serial=%d, unchanged', serial)
+            return iter(self._catalog[1])
+
+        # members are the PTRs at <unique-id>.zones.<catalog>, anything else,
+        # e.g. version or member properties, is ignored
+        suffix = f'.zones.{catalog_zone}'
+        members = set()
+        for rr in self.zone_records(Zone(catalog_zone, []), target=False):
+            if rr._type != 'PTR' or not rr.name.endswith(suffix):
+                continue
+            if '.' not in rr.name[: -len(suffix)]:
+                members.add(rr.rdata)
+        members = sorted(members)
+        self.log.info(
+            'list_zones: serial=%s, found %d member zones', serial, len(members)
+        )
+
+        self._catalog = (serial, members)
+        return iter(members)
+
     def zone_exists(self, zone, target=False):
         # We can't create them so they have to already exist
         return True
 
     def zone_records(self, zone, target):
+        # concurrent requests for the same zone share a single transfer
+        return self._single_flight.do(zone.name, self._transfer, zone)
+
+    def _transfer(self, zone):
+        # at most max_transfers at once to stay under the server's limit, e.g.
+        # Bind's transfers-out, with REFUSED ones retried after backing off
+        limit = _transfer_limit(
+            self.host, self.port, self.max_transfers, self.log
+        )
+        delay = self.transfer_backoff
+        attempts = 0
+        while True:
+            try:
+                with limit:
+                    return self._axfr(zone)
+            except AxfrSourceZoneTransferFailed as err:
+                if (
+                    err.rcode != dns.rcode.REFUSED
+                    or attempts == self.transfer_retries
+                ):
+                    raise
+            attempts += 1
+            self.log.info(
+                '_transfer: zone=%s, refused, retrying in %.1fs',
+                zone.name,
+                delay,
+            )
+            sleep(delay)
+            delay *= 2
+
+    def _axfr(self, zone):
         auth_params = self._auth_params()
         try:
             z = dns.zone.from_xfr(
@@ -485,15 +2571,225 @@ class AxfrPopulate(RfcPopulate):
 
         return records
 
+    def _order_changes(self, changes):
+        # DNSSEC canonical order puts names that share suffixes next to each
+        # other, which lets name compression in each UPDATE do the most good.
+        # At each node deletes go first so that things like replacing an A
+        # with a CNAME work.
+        def key(change):
+            labels = change.record.fqdn.lower().split('.')
+            if isinstance(change, Delete):
+                order = 0
+            elif isinstance(change, Update):
+                order = 1
+            else:  # isinstance(change, Create):
+                order = 2
+            return (labels[::-1], order, change.record._type)
+
+        return sorted(changes, key=key)
+
     def _batch_changes(self, changes):
-        for i in range(0, len(changes), self.update_batch_size):
-            yield changes[i : i + self.update_batch_size]
+        # keeps all of the changes to a node in a single UPDATE so that they're
+        # applied together, unless there are more of them than fit in one
+        size = self.update_batch_size
+        batch = []
+        for _, node in groupby(
+            self._order_changes(changes), key=lambda c: c.record.fqdn.lower()
+        ):
+            node = list(node)
+            if batch and len(batch) + len(node) > size:
+                yield batch
+                batch = []
+            batch.extend(node)
+            while len(batch) > size:
+                yield batch[:size]
+                batch = batch[size:]
+        if batch:
+            yield batch
 
 
 class AxfrSource(AxfrPopulate, BaseSource):
     pass
 
 
+def _update_wire_size(update):
+    # the size of update on the wire, or when it's too big to be rendered at
+    # all, an upper bound on it with every name written out in full
+    try:
+        return len(update.to_wire())
+    except dns.exception.TooBig:
+        buf = BytesIO()
+        for section in update.sections[1:]:
+            for rrset in section:
+                rrset.to_wire(buf)
+        # header, the zone's question, and the records
+        return 12 + len(update.origin.to_wire()) + 4 + len(buf.getvalue())
+
+
+def _rr_wire_size(_type, rdata):
+    # the size of an RR in an UPDATE that's sharing its owner name with others,
+    # a 2 byte compression pointer for the name, 10 bytes of type, class, TTL,
+    # and rdata length, then the rdata itself
+    size = 12
+    if rdata is not None:
+        size += len(
+            dns.rdata.from_text(dns.rdataclass.IN, _type, rdata).to_wire()
+        )
+    return size
+
+
+# zone, name, type, and rdata are dictionary encoded, each distinct value is
+# stored once and the rows hold indexes into the list of them
+_COLUMNAR_MAGIC = b'OCTODNS-BIND-COLUMNAR\x00\x01'
+_COLUMNAR_STRINGS = ('zone', 'name', 'type', 'rdata')
+_COLUMNAR_COLUMNS = _COLUMNAR_STRINGS + ('ttl', 'zone_rows')
+_COLUMNAR_LENGTH = Struct('<I')
+
+
+class _ColumnarWriter:
+    def __init__(self):
+        self.dictionaries = {c: {} for c in _COLUMNAR_STRINGS}
+        self.columns = {c: array('I') for c in _COLUMNAR_COLUMNS}
+        self.rows = 0
+
+    def _encode(self, column, value):
+        dictionary = self.dictionaries[column]
+        index = dictionary.get(value)
+        if index is None:
+            index = dictionary[value] = len(dictionary)
+        return index
+
+    def add(self, zone_name, rrs):
+        columns = self.columns
+        zone = self._encode('zone', zone_name)
+        before = self.rows
+        for rr in rrs:
+            columns['zone'].append(zone)
+            columns['name'].append(self._encode('name', rr.name))
+            columns['type'].append(self._encode('type', rr._type))
+            columns['ttl'].append(rr.ttl)
+            columns['rdata'].append(self._encode('rdata', rr.rdata))
+            self.rows += 1
+        # rows are written out a zone at a time, this is how many each has
+        columns['zone_rows'].append(self.rows - before)
+
+    def _chunks(self):
+        def blob(data):
+            data = compress(data)
+            return _COLUMNAR_LENGTH.pack(len(data)) + data
+
+        yield _COLUMNAR_MAGIC
+        for column in _COLUMNAR_STRINGS:
+            # dict order is insertion order, which is index order
+            yield blob('\0'.join(self.dictionaries[column]).encode())
+        for column in _COLUMNAR_COLUMNS:
+            values = self.columns[column]
+            yield blob(Struct(f'<{len(values)}I').pack(*values))
+
+    def write(self, filename):
+        _write_atomic(filename, self._chunks(), mode='wb')
+
+
+def _read_columnar(filename):
+    with open(filename, 'rb') as fh:
+        data = fh.read()
+    if not data.startswith(_COLUMNAR_MAGIC):
+        raise ColumnarSourceException(f'{filename} is not a columnar export')
+
+    blobs = []
+    offset = len(_COLUMNAR_MAGIC)
+    while offset < len(data):
+        (length,) = _COLUMNAR_LENGTH.unpack_from(data, offset)
+        offset += _COLUMNAR_LENGTH.size
+        blobs.append(decompress(data[offset : offset + length]))
+        offset += length
+
+    n = len(_COLUMNAR_STRINGS)
+    dictionaries = {
+        c: blob.decode().split('\0')
+        for c, blob in zip(_COLUMNAR_STRINGS, blobs[:n])
+    }
+    columns = {}
+    for c, blob in zip(_COLUMNAR_COLUMNS, blobs[n:]):
+        # always little-endian, whatever the machine that wrote it
+        columns[c] = array('I', Struct(f'<{len(blob) // 4}I').unpack(blob))
+
+    return dictionaries, columns
+
+
+class ColumnarSourceException(Exception):
+    pass
+
+
+class ColumnarSource(RfcPopulate, BaseSource):
+    '''
+    Reads zones back out of a file written by `export_columnar`, which is
+    available on ZoneFileSource, AxfrSource, and friends.
+
+    config:
+        class: octodns_bind.ColumnarSource
+        # The file written by export_columnar
+        filename: ./zones.columnar
+    '''
+
+    def __init__(self, id, filename, *args, **kwargs):
+        self.log = getLogger(f'ColumnarSource[{id}]')
+        self.log.debug('__init__: id=%s, filename=%s', id, filename)
+        super().__init__(id, *args, **kwargs)
+        self.filename = filename
+
+        self._dictionaries = None
+        self._columns = None
+        # zone name -> (start row, end row)
+        self._zones = None
+
+    def _load(self):
+        if self._zones is None:
+            self._single_flight.do(self.filename, self._read)
+        return self._zones
+
+    def _read(self):
+        if self._zones is not None:
+            # another thread read it while we were waiting
+            return
+        dictionaries, columns = _read_columnar(self.filename)
+        zones = {}
+        start = 0
+        for zone_name, n in zip(dictionaries['zone'], columns['zone_rows']):
+            zones[zone_name] = (start, start + n)
+            start += n
+        self.log.debug('_read: %d zones, %d rows', len(zones), start)
+        # _zones goes last, it's what says everything else is ready
+        self._dictionaries = dictionaries
+        self._columns = columns
+        self._zones = zones
+
+    def list_zones(self):
+        return sorted(self._load())
+
+    def zone_exists(self, zone, target=False):
+        return zone.name in self._load()
+
+    def zone_records(self, zone, target):
+        try:
+            start, end = self._load()[zone.name]
+        except KeyError:
+            return []
+        names = self._dictionaries['name']
+        types = self._dictionaries['type']
+        rdatas = self._dictionaries['rdata']
+        columns = self._columns
+        return [
+            Rr(names[n], types[t], ttl, rdatas[r])
+            for n, t, ttl, r in zip(
+                columns['name'][start:end],
+                columns['type'][start:end],
+                columns['ttl'][start:end],
+                columns['rdata'][start:end],
+            )
+        ]
+
+
 class Rfc2136ProviderException(Exception):
     pass
 
@@ -513,36 +2809,451 @@ class Rfc2136Provider(AxfrPopulate, BaseProvider):
 
     SUPPORTS_ROOT_NS = True
 
-    def _apply(self, plan):
-        desired = plan.desired
-        auth_params = self._auth_params()
+    def __init__(
+        self, *args, checkpoint_directory=None, zonemd=False, **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.log.debug(
+            '__init__: checkpoint_directory=%s, zonemd=%s',
+            checkpoint_directory,
+            zonemd,
+        )
+        self.checkpoint_directory = checkpoint_directory
+        self.zonemd = zonemd
+
+    def _zonemd_matches(self, zone):
+        '''
+        Whether the server's ZONEMD matches one worked out over the records in
+        zone and the server's SOA, i.e. the server has exactly what zone does.
+        '''
+        answers = {}
+        for rdtype in (dns.rdatatype.SOA, dns.rdatatype.ZONEMD):
+            query = dns.message.make_query(zone.name, rdtype)
+            try:
+                response = dns.query.udp(
+                    query, self.host, port=self.port, timeout=self.timeout
+                )
+            except (DNSException, OSError) as err:
+                self.log.warning(
+                    '_zonemd_matches: zone=%s, failed: %s', zone.name, err
+                )
+                return False
+            answers[rdtype] = response.get_rrset(
+                response.answer,
+                query.question[0].name,
+                dns.rdataclass.IN,
+                rdtype,
+            )
+        soa = answers[dns.rdatatype.SOA]
+        zonemds = answers[dns.rdatatype.ZONEMD]
+        if soa is None or zonemds is None:
+            self.log.debug('_zonemd_matches: zone=%s, no ZONEMD', zone.name)
+            return False
 
-        for batch in self._batch_changes(plan.changes):
-            update = DnsUpdate(desired.name, **auth_params)
+        rrsets = [(zone.name, soa.ttl, 'SOA', [soa[0].to_text()])]
+        for record in zone.records:
+            rrsets.append(
+                (record.fqdn, record.ttl, record._type, _rdata_texts(record))
+            )
+        for zonemd in zonemds:
+            if zonemd.serial != soa[0].serial:
+                # stale, it doesn't cover what's there now
+                continue
+            try:
+                computed = _compute_zonemd(
+                    zone.name, rrsets, zonemd.hash_algorithm, zonemd.scheme
+                )
+            except (
+                dns.zone.UnsupportedDigestHashAlgorithm,
+                dns.zone.UnsupportedDigestScheme,
+            ):
+                continue
+            if computed.digest == zonemd.digest:
+                return True
+        return False
+
+    def plan(self, desired, processors=[], *args, **kwargs):
+        if (self.checkpoint_directory or self.zonemd) and not processors:
+            processed = self._process_desired_zone(desired.copy())
+            if self.checkpoint_directory:
+                # picking up where a failed apply left off doesn't need the
+                # zone transferred or planned either
+                plan = self._resume_plan(processed)
+                if plan is not None:
+                    return plan
+            # if the server already has exactly what's desired there's no need
+            # to transfer the zone and work out that nothing has changed
+            if self.zonemd and self._zonemd_matches(processed):
+                self.log.info(
+                    'plan: desired=%s, ZONEMD matches', desired.decoded_name
+                )
+                return None
 
-            for change in batch:
-                record = change.record
-                name, ttl, _type, rdatas = record.rrs
+        return super().plan(desired, processors, *args, **kwargs)
 
-                if isinstance(change, Create):
-                    update.add(name, ttl, _type, *rdatas)
-                elif isinstance(change, Update):
-                    update.replace(name, ttl, _type, *rdatas)
-                else:  # isinstance(change, Delete):
-                    update.delete(name, _type, *rdatas)
-
-            self.log.debug(
-                '_apply: zone=%s, num_records=%d', desired.name, len(batch)
+    def _serial(self, zone_name):
+        query = dns.message.make_query(zone_name, dns.rdatatype.SOA)
+        r = dns.query.tcp(
+            query, self.host, port=self.port, timeout=self.timeout
+        )
+        return r.answer[0][0].serial
+
+    def _checkpoint_path(self, zone_name):
+        filename = zone_name[:-1].replace('/', '-')
+        return join(self.checkpoint_directory, f'{filename}.json')
+
+    def _desired_hash(self, desired):
+        # what a checkpoint is for, only what's desired, as what was there
+        # will have changed by the time it's resumed
+        h = sha256()
+        for record in sorted(desired.records):
+            h.update(repr(record.rrs).encode())
+        return h.hexdigest()
+
+    def _checkpoint(self, desired, changes):
+        def rrset(record):
+            if record is None:
+                return None
+            _, ttl, _, rdatas = record.rrs
+            return [ttl, list(rdatas)]
+
+        checkpoint = {
+            'zone': desired.name,
+            'desired': self._desired_hash(desired),
+            'changes': [
+                [
+                    change.__class__.__name__,
+                    change.record.fqdn,
+                    change.record._type,
+                    rrset(change.existing),
+                    rrset(change.new),
+                ]
+                for change in changes
+            ],
+        }
+        makedirs(self.checkpoint_directory, exist_ok=True)
+        _write_atomic(
+            self._checkpoint_path(desired.name), (json.dumps(checkpoint),)
+        )
+
+    def _remove_checkpoint(self, zone_name):
+        try:
+            remove(self._checkpoint_path(zone_name))
+        except FileNotFoundError:
+            pass
+
+    def _resume_plan(self, desired):
+        '''
+        Returns a plan of the changes a previous apply of desired didn't get
+        through, from its checkpoint, or None if there isn't one. What was
+        there is worked back from desired and the changes. Applying it checks
+        that each RRset is still as it was planned before changing it.
+        '''
+        try:
+            with open(self._checkpoint_path(desired.name)) as fh:
+                checkpoint = json.load(fh)
+        except FileNotFoundError:
+            return None
+        if checkpoint['desired'] != self._desired_hash(desired):
+            self.log.info(
+                '_resume_plan: zone=%s, checkpoint is for something else',
+                desired.name,
             )
-            r: dns.message.Message = dns.query.tcp(
+            return None
+
+        existing = Zone(desired.name, desired.sub_zones)
+
+        def record(fqdn, _type, rrset):
+            if rrset is None:
+                return None
+            ttl, rdatas = rrset
+            rrs = [Rr(fqdn, _type, ttl, rdata) for rdata in rdatas]
+            return Record.from_rrs(existing, rrs, lenient=True)[0]
+
+        records = {(r.fqdn, r._type): r for r in desired.records}
+        changes = []
+        for kind, fqdn, _type, existing_rrset, new_rrset in checkpoint[
+            'changes'
+        ]:
+            old = record(fqdn, _type, existing_rrset)
+            new = record(fqdn, _type, new_rrset)
+            if kind == 'Create':
+                changes.append(Create(new))
+                del records[(fqdn, _type)]
+            elif kind == 'Update':
+                changes.append(Update(old, new))
+                records[(fqdn, _type)] = old
+            else:
+                changes.append(Delete(old))
+                records[(fqdn, _type)] = old
+        for r in records.values():
+            existing.add_record(r, lenient=True)
+
+        self.log.info(
+            '_resume_plan: zone=%s, resuming with %d changes',
+            desired.name,
+            len(changes),
+        )
+        return Plan(
+            existing,
+            desired,
+            changes,
+            True,
+            update_pcent_threshold=self.update_pcent_threshold,
+            delete_pcent_threshold=self.delete_pcent_threshold,
+            meta={'checkpoint': True},
+        )
+
+    def _update_rrset(self, update, change, measure=False):
+        '''
+        Adds the minimal set of RRs needed to turn change.existing into
+        change.new to update, adding the values that are new and then deleting
+        the ones that have gone away. A TTL change has to touch every RR so all
+        of the values are added, with the new TTL. With measure, returns the
+        number of bytes saved on the wire compared to replacing the RRset,
+        which means parsing every value, otherwise 0.
+        '''
+        name, ttl, _type, rdatas = change.new.rrs
+        _, existing_ttl, _, existing_rdatas = change.existing.rrs
+
+        if ttl != existing_ttl:
+            adds = rdatas
+        else:
+            adds = [r for r in rdatas if r not in existing_rdatas]
+        deletes = [r for r in existing_rdatas if r not in rdatas]
+        # adds go first, RFC 2136 3.4.2.4 has servers ignore deleting the last
+        # of the apex NS, which would leave one of the old ones behind
+        if adds:
+            update.add(name, ttl, _type, *adds)
+        if deletes:
+            update.delete(name, _type, *deletes)
+
+        if not measure:
+            return 0
+        # deleting an RRset is an RR without rdata
+        replaced = [None] + rdatas
+        return sum(_rr_wire_size(_type, r) for r in replaced) - sum(
+            _rr_wire_size(_type, r) for r in adds + deletes
+        )
+
+    def mirror(self, source, zone_names=None):
+        '''
+        Makes the zones on the server match those in source, e.g. another
+        server's AxfrSource or a ZoneFileProvider, without going through
+        octoDNS Records, plans, or validation. Only the types in SUPPORTS are
+        kept and names are lowercased. RRsets that differ have the values that
+        are new added and then the ones that have gone away deleted, as with
+        apply, and ones that aren't in source are deleted, update_batch_size
+        RRsets at a time. zone_names defaults to everything source.list_zones
+        returns.
+
+        Returns a dict mapping each zone name to the number of RRsets that were
+        changed or the exception that was raised mirroring it.
+        '''
+        return _mirror(self, source, zone_names)
+
+    def _mirror_zone(self, zone, rrsets):
+        existing = _mirror_rrsets(
+            self.zone_records(zone, target=True), self.SUPPORTS
+        )
+        # (name, type, ttl, rdatas to add, rdatas to delete or None to delete
+        # the whole RRset)
+        changes = []
+        for (name, _type), (ttl, rdatas) in existing.items():
+            if (name, _type) in rrsets:
+                continue
+            if name == zone.name and _type == 'NS':
+                # RFC 2136 3.4.2.3 has servers ignore deleting the apex NS
+                # RRset, the values have to go one by one, all but the last
+                changes.append((name, _type, ttl, [], rdatas))
+            else:
+                changes.append((name, _type, ttl, [], None))
+        for key, (ttl, rdatas) in rrsets.items():
+            current_ttl, current_rdatas = existing.get(key, (None, []))
+            current_rdatas = set(current_rdatas)
+            if ttl == current_ttl:
+                adds = [r for r in rdatas if r not in current_rdatas]
+            else:
+                # a TTL change has to touch every value, see _update_rrset
+                adds = rdatas
+            deletes = list(current_rdatas.difference(rdatas))
+            if adds or deletes:
+                changes.append((*key, ttl, adds, deletes))
+
+        auth_params = self._auth_params()
+        size = self.update_batch_size
+        for i in range(0, len(changes), size):
+            update = DnsUpdate(zone.name, **auth_params)
+            for name, _type, ttl, adds, deletes in changes[i : i + size]:
+                # adds go first, see _update_rrset
+                if adds:
+                    update.add(name, ttl, _type, *adds)
+                if deletes is None:
+                    update.delete(name, _type)
+                elif deletes:
+                    update.delete(name, _type, *sorted(deletes))
+            r = dns.query.tcp(
                 update, self.host, port=self.port, timeout=self.timeout
             )
             if r.rcode() != dns.rcode.NOERROR:
                 raise Rfc2136ProviderUpdateFailed(dns.rcode.to_text(r.rcode()))
 
+        self.log.debug(
+            '_mirror_zone: zone=%s, num_rrsets=%d', zone.name, len(changes)
+        )
+        return len(changes)
+
+    def _compile_batch(
+        self, zone_name, batch, auth_params, prerequisites=False
+    ):
+        # the UPDATE for a batch of changes and, when debugging, the bytes
+        # _update_rrset saved
+        update = DnsUpdate(zone_name, **auth_params)
+        measure = self.log.isEnabledFor(DEBUG)
+        saved = 0
+
+        for change in batch:
+            record = change.record
+            name, ttl, _type, rdatas = record.rrs
+
+            if prerequisites:
+                # the server only applies the batch if the RRsets are still as
+                # they were planned
+                if isinstance(change, Create):
+                    update.absent(name, _type)
+                else:
+                    update.present(name, _type, *change.existing.rrs[3])
+
+            if isinstance(change, Create):
+                update.add(name, ttl, _type, *rdatas)
+            elif isinstance(change, Update):
+                saved += self._update_rrset(update, change, measure)
+            else:  # isinstance(change, Delete):
+                update.delete(name, _type, *rdatas)
+
+        return update, saved
+
+    def _round_trip(self, zone_name):
+        # an SOA query over TCP opens its own connection, just like each UPDATE
+        start = perf_counter()
+        self._serial(zone_name)
+        return perf_counter() - start
+
+    def estimate(self, plan, rtt=None):
+        '''
+        Compiles plan into the UPDATE messages that applying it would send,
+        without sending any of them, so that things like update_batch_size can
+        be tuned before a rollout. rtt is the round trip time to host in
+        seconds, when it's None it's measured with a query for the zone's SOA.
+
+        Returns a dict with the number of messages and round trips, the size
+        of each message in bytes along with their total and the largest, the
+        1-based numbers of the messages over the 65535 byte limit, which
+        couldn't be sent, and the rtt and estimated duration in seconds. Each
+        message is a round trip. Time spent by the server applying the
+        changes isn't included.
+        '''
+        zone_name = plan.desired.name
+        auth_params = self._auth_params()
+
+        sizes = []
+        for batch in self._batch_changes(plan.changes):
+            update, _ = self._compile_batch(zone_name, batch, auth_params)
+            sizes.append(_update_wire_size(update))
+        oversized = [i for i, size in enumerate(sizes, 1) if size > 65535]
+
+        if rtt is None:
+            rtt = self._round_trip(zone_name)
+        round_trips = len(sizes)
+
+        estimate = {
+            'messages': len(sizes),
+            'round_trips': round_trips,
+            'sizes': sizes,
+            'bytes': sum(sizes),
+            'largest': max(sizes, default=0),
+            'oversized': oversized,
+            'rtt': rtt,
+            'duration': round_trips * rtt,
+        }
+        self.log.info(
+            'estimate: zone=%s, messages=%d, bytes=%d, largest=%d, oversized=%d, duration=%.2fs',
+            zone_name,
+            estimate['messages'],
+            estimate['bytes'],
+            estimate['largest'],
+            len(oversized),
+            estimate['duration'],
+        )
+        if oversized:
+            self.log.warning(
+                'estimate: zone=%s, messages %s are over 65535 bytes, lower update_batch_size',
+                zone_name,
+                oversized,
+            )
+
+        return estimate
+
+    def _apply(self, plan):
+        desired = plan.desired
+        auth_params = self._auth_params()
+        saved = 0
+
+        # resumed from a checkpoint, the zone may have moved on since
+        resumed = bool(plan.meta and plan.meta.get('checkpoint'))
+        batches = list(self._batch_changes(plan.changes))
+        done = 0
+        stale = False
+        try:
+            for batch in batches:
+                update, batch_saved = self._compile_batch(
+                    desired.name, batch, auth_params, resumed
+                )
+                saved += batch_saved
+
+                self.log.debug(
+                    '_apply: zone=%s, num_records=%d', desired.name, len(batch)
+                )
+                r: dns.message.Message = dns.query.tcp(
+                    update, self.host, port=self.port, timeout=self.timeout
+                )
+                if r.rcode() != dns.rcode.NOERROR:
+                    # a prerequisite failed, the checkpoint is no good
+                    stale = r.rcode() in (dns.rcode.NXRRSET, dns.rcode.YXRRSET)
+                    raise Rfc2136ProviderUpdateFailed(
+                        dns.rcode.to_text(r.rcode())
+                    )
+                done += 1
+        except BaseException:
+            # only a failure needs a checkpoint, of the changes that weren't
+            # acknowledged, so a plan that goes through costs nothing extra
+            if self.checkpoint_directory and stale:
+                self.log.warning(
+                    '_apply: zone=%s, zone changed since the checkpoint, removing it',
+                    desired.name,
+                )
+                self._remove_checkpoint(desired.name)
+            elif self.checkpoint_directory and done:
+                try:
+                    self._checkpoint(
+                        desired, chain.from_iterable(batches[done:])
+                    )
+                except Exception as err:
+                    self.log.warning(
+                        '_apply: zone=%s, unable to checkpoint: %s',
+                        desired.name,
+                        err,
+                    )
+            raise
+
+        if self.checkpoint_directory:
+            # the plan has been applied in full, there's nothing to resume
+            self._remove_checkpoint(desired.name)
+
         self.log.debug(
             '_apply: zone=%s, total_changes=%d', desired.name, len(plan.changes)
         )
+        self.log.debug('_apply: zone=%s, bytes_saved=%d', desired.name, saved)
 
         return True
 
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+'''
+octoDNS Bind zone mirror, copies zones between providers without Records
+'''
+
+import sys
+
+from octodns.cmds.args import ArgumentParser
+from octodns.manager import Manager
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split('\n')[1])
+
+    parser.add_argument(
+        '--config-file',
+        required=True,
+        help='The Manager configuration file to use',
+    )
+    parser.add_argument(
+        'source',
+        help='The configured provider to mirror from, anything with '
+        'zone_records, e.g. an AxfrSource or ZoneFileSource',
+    )
+    parser.add_argument(
+        'target',
+        help='The configured provider to mirror to, a ZoneFileProvider or '
+        'Rfc2136Provider',
+    )
+    parser.add_argument(
+        'zone',
+        nargs='*',
+        help='Zone(s) to mirror, defaults to everything the source lists',
+    )
+
+    args = parser.parse_args()
+
+    manager = Manager(args.config_file)
+    source = manager.providers[args.source]
+    target = manager.providers[args.target]
+
+    results = target.mirror(source, args.zone or None)
+    if any(isinstance(r, Exception) for r in results.values()):
+        sys.exit(1)
@@ -0,0 +1,44 @@
+#
+#
+#
+
+from os.path import exists, join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+from unittest.mock import patch
+
+from octodns_bind.cmds.mirror import main
+
+
+class TestMirror(TestCase):
+    def setUp(self):
+        self.dirname = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.dirname)
+
+    def run_main(self, *args):
+        config = join(self.dirname, 'config.yaml')
+        with open(config, 'w') as fh:
+            fh.write(f'''
+providers:
+  source:
+    class: octodns_bind.ZoneFileSource
+    directory: ./tests/zones
+  target:
+    class: octodns_bind.ZoneFileProvider
+    directory: {self.dirname}/zones
+zones: {{}}
+''')
+        argv = ['octodns-bind-mirror', '--config-file', config, *args]
+        with patch('sys.argv', argv):
+            main()
+
+    def test_mirror(self):
+        self.run_main('source', 'target', 'unit.tests.')
+        self.assertTrue(exists(join(self.dirname, 'zones', 'unit.tests.')))
+
+        with self.assertRaises(SystemExit) as ctx:
+            self.run_main('source', 'target', 'unit.tests.', 'missing.tests.')
+        self.assertEqual(1, ctx.exception.code)
@@ -2,30 +2,69 @@
 #
 #
 
+import bz2
+import gzip
+import json
+import lzma
+import pickle
 import socket
-from os.path import exists, join
+import sys
+from math import inf
+from os import listdir, makedirs, remove, stat
+from os.path import dirname, exists, join
+from random import Random
 from shutil import copyfile, rmtree
 from tempfile import mkdtemp
+from threading import Barrier, Event, Lock, Thread
+from time import sleep
 from unittest import TestCase
-from unittest.mock import patch
-
+from unittest.mock import Mock, patch
+
+import dns.flags
+import dns.message
+import dns.name
+import dns.opcode
+import dns.rcode
+import dns.rdatatype
 import dns.resolver
+import dns.rrset
+import dns.xfr
 import dns.zone
 from dns.exception import DNSException
+from dns.update import Update as DnsUpdate
 
+from octodns.processor.base import BaseProcessor
 from octodns.provider.plan import Plan
-from octodns.record import Create, Record, Rr, Update, ValidationError
+from octodns.record import Create, Delete, Record, Rr, Update, ValidationError
 from octodns.zone import Zone
 
 from octodns_bind import (
     AxfrSource,
+    AxfrSourceException,
     AxfrSourceZoneTransferFailed,
+    ColumnarSource,
+    ColumnarSourceException,
     Rfc2136Provider,
     Rfc2136ProviderUpdateFailed,
     ZoneFileProvider,
     ZoneFileSource,
+    ZoneFileSourceException,
     ZoneFileSourceLoadFailure,
     ZoneFileSourceNotFound,
+    _apply_changes,
+    _assign_shards,
+    _ColumnarWriter,
+)
+from octodns_bind import _InotifyZoneFileWatcher as _Inotify
+from octodns_bind import _load_zone_shard
+from octodns_bind import _PollingZoneFileWatcher as _Polling
+from octodns_bind import (
+    _Profiler,
+    _rdata_to_text,
+    _read_columnar,
+    _rendezvous,
+    _transfer_limit,
+    _write_atomic,
 )
 
 
@@ -44,6 +83,27 @@ class TemporaryDirectory(object):
             raise Exception(self.dirname)
 
 
+def run_concurrently(fn, threads=16):
+    # calls fn from threads threads all released at once, returning what each
+    # of them returned or raised
+    barrier = Barrier(threads)
+    results = [None] * threads
+
+    def run(i):
+        barrier.wait()
+        try:
+            results[i] = fn()
+        except Exception as err:
+            results[i] = err
+
+    workers = [Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+
 class TestAxfrSource(TestCase):
     source = AxfrSource('test', '127.0.0.1')
 
@@ -74,6 +134,84 @@ class TestAxfrSource(TestCase):
             str(ctx.exception).split(':', 1)[0],
         )
 
+    @patch('octodns_bind.AxfrSource.soa_serials')
+    @patch('dns.zone.from_xfr')
+    def test_list_zones_catalog(self, from_xfr_mock, soa_serials_mock):
+        with self.assertRaises(AxfrSourceException) as ctx:
+            list(self.source.list_zones())
+        self.assertEqual('list_zones requires catalog_zone', str(ctx.exception))
+
+        catalog = dns.zone.from_text(
+            '''
+@ 0 IN SOA invalid. invalid. 1 3600 600 2147483646 0
+@ 0 IN NS invalid.
+version 0 IN TXT "2"
+a1 0 IN PTR unit.tests.zones.catalog.tests.
+a1.zones 0 IN PTR unit.tests.
+b2.zones 0 IN PTR 2.0.192.in-addr.arpa.
+group.b2.zones 0 IN TXT "primary"
+c3.zones 0 IN PTR unit.tests.
+other.c3.zones 0 IN PTR not-a-member.tests.
+''',
+            'catalog.tests.',
+            relativize=False,
+        )
+        from_xfr_mock.return_value = catalog
+        source = AxfrSource('test', '127.0.0.1', catalog_zone='catalog.tests.')
+
+        expected = ['2.0.192.in-addr.arpa.', 'unit.tests.']
+        soa_serials_mock.return_value = {'catalog.tests.': 1}
+        self.assertEqual(expected, list(source.list_zones()))
+        soa_serials_mock.assert_called_once_with(['catalog.tests.'], sockets=1)
+        from_xfr_mock.assert_called_once()
+
+        # unchanged, no need to transfer it again
+        self.assertEqual(expected, list(source.list_zones()))
+        from_xfr_mock.assert_called_once()
+
+        # the serial moved on
+        soa_serials_mock.return_value = {'catalog.tests.': 2}
+        self.assertEqual(expected, list(source.list_zones()))
+        self.assertEqual(2, from_xfr_mock.call_count)
+
+        # the serial couldn't be found, transfer to be safe
+        soa_serials_mock.return_value = {'catalog.tests.': None}
+        self.assertEqual(expected, list(source.list_zones()))
+        self.assertEqual(3, from_xfr_mock.call_count)
+        self.assertEqual(expected, list(source.list_zones()))
+        self.assertEqual(4, from_xfr_mock.call_count)
+
+    @patch('dns.zone.from_xfr')
+    def test_populate_concurrent(self, from_xfr_mock):
+        source = AxfrSource('test', '127.0.0.1')
+
+        def from_xfr(*args, **kwargs):
+            sleep(0.1)
+            return self.forward_zonefile
+
+        from_xfr_mock.side_effect = from_xfr
+
+        def populate():
+            zone = Zone('unit.tests.', [])
+            source.populate(zone)
+            return len(zone.records)
+
+        # everyone shares a single transfer
+        self.assertEqual([23] * 16, run_concurrently(populate))
+        self.assertEqual(1, from_xfr_mock.call_count)
+
+        # nothing's cached, once it's done the next one transfers again
+        self.assertEqual(23, populate())
+        self.assertEqual(2, from_xfr_mock.call_count)
+
+        # as do failures
+        from_xfr_mock.reset_mock()
+        from_xfr_mock.side_effect = DNSException('boom')
+        results = run_concurrently(populate, threads=4)
+        for result in results:
+            self.assertIsInstance(result, AxfrSourceZoneTransferFailed)
+        self.assertLessEqual(from_xfr_mock.call_count, 4)
+
     @patch('dns.zone.from_xfr')
     def test_populate_reverse(self, from_xfr_mock):
         got = Zone('2.0.192.in-addr.arpa.', [])
@@ -83,6 +221,237 @@ class TestAxfrSource(TestCase):
         self.source.populate(got)
         self.assertEqual(4, len(got.records))
 
+    def test_soa_serials(self):
+        def soa_response(query, serial):
+            response = dns.message.make_response(query)
+            response.answer.append(
+                dns.rrset.from_text(
+                    query.question[0].name,
+                    3600,
+                    'IN',
+                    'SOA',
+                    f'ns.tests. root.tests. {serial} 1 1 1 1',
+                )
+            )
+            return response
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        sock.settimeout(0.05)
+        stop = Event()
+
+        def serve():
+            while not stop.is_set():
+                try:
+                    wire, addr = sock.recvfrom(65535)
+                except socket.timeout:
+                    continue
+                query = dns.message.from_wire(wire)
+                name = query.question[0].name.to_text()
+                response = soa_response(query, len(name))
+                if name.startswith('drop'):
+                    continue
+                elif name == 'truncated.tests.':
+                    response.flags |= dns.flags.TC
+                elif name == 'garbage.tests.':
+                    sock.sendto(b'garbage', addr)
+                elif name == 'other.tests.':
+                    # a reply that isn't to anything we asked
+                    other = dns.message.make_query(name, 'SOA')
+                    other.id = (query.id + 1) & 0xFFFF
+                    sock.sendto(soa_response(other, 1).to_wire(), addr)
+                    # nor this, right id, but for the wrong question
+                    other.id = query.id
+                    other.question[0].name = dns.name.from_text('wrong.')
+                    sock.sendto(soa_response(other, 1).to_wire(), addr)
+                elif name == 'missing.tests.':
+                    response.set_rcode(dns.rcode.NXDOMAIN)
+                    response.answer = []
+                elif name == 'alias.tests.':
+                    response.answer = [
+                        dns.rrset.from_text(
+                            name, 3600, 'IN', 'CNAME', 'unit.tests.'
+                        )
+                    ]
+                sock.sendto(response.to_wire(), addr)
+
+        def tcp(query, *args, **kwargs):
+            name = query.question[0].name.to_text()
+            if name == 'drop-failed.tests.':
+                raise DNSException('nope')
+            return soa_response(query, 1000 + len(name))
+
+        thread = Thread(target=serve)
+        thread.start()
+        try:
+            source = AxfrSource('test', '127.0.0.1', port=sock.getsockname()[1])
+            with patch('dns.query.tcp', side_effect=tcp):
+                serials = source.soa_serials(
+                    [
+                        'unit.tests.',
+                        'drop.tests.',
+                        'truncated.tests.',
+                        'garbage.tests.',
+                        'other.tests.',
+                        'missing.tests.',
+                        'alias.tests.',
+                        'drop-failed.tests.',
+                    ],
+                    sockets=2,
+                    window=3,
+                    timeout=0.2,
+                )
+            self.assertEqual(
+                {
+                    'unit.tests.': 11,
+                    # retried over tcp
+                    'drop.tests.': 1011,
+                    'truncated.tests.': 1016,
+                    'garbage.tests.': 14,
+                    'other.tests.': 12,
+                    'missing.tests.': None,
+                    'alias.tests.': None,
+                    'drop-failed.tests.': None,
+                },
+                serials,
+            )
+
+            # query ids are kept unique per socket
+            with patch('dns.entropy.random_16') as random_16_mock:
+                random_16_mock.return_value = 42
+                serials = source.soa_serials(
+                    ['unit.tests.', 'other.tests.'], sockets=1
+                )
+            self.assertEqual({'unit.tests.': 11, 'other.tests.': 12}, serials)
+        finally:
+            stop.set()
+            thread.join()
+            sock.close()
+
+    @patch('octodns_bind.sleep')
+    @patch('octodns_bind.AxfrPopulate._axfr')
+    def test_transfer_zones(self, axfr_mock, sleep_mock):
+        # a port of its own so that nothing else has set the host's limit
+        source = AxfrSource('test', '127.0.0.1', port=5301, max_transfers=1)
+        refused = AxfrSourceZoneTransferFailed(
+            dns.xfr.TransferError(dns.rcode.REFUSED)
+        )
+        self.assertEqual(dns.rcode.REFUSED, refused.rcode)
+        notauth = AxfrSourceZoneTransferFailed(
+            dns.xfr.TransferError(dns.rcode.NOTAUTH)
+        )
+        responses = {
+            'a.tests.': [[1, 2, 3]],
+            'b.tests.': [[1]],
+            'c.tests.': [refused, refused, [1, 2]],
+            'd.tests.': [refused] * 4,
+            'e.tests.': [notauth],
+        }
+        transferred = []
+
+        def axfr(zone):
+            transferred.append(zone.name)
+            response = responses[zone.name].pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        axfr_mock.side_effect = axfr
+
+        results = source.transfer_zones(
+            ['a.tests.', 'b.tests.', 'c.tests.', 'd.tests.', 'e.tests.']
+        )
+        self.assertEqual(
+            {
+                'a.tests.': [1, 2, 3],
+                'b.tests.': [1],
+                'c.tests.': [1, 2],
+                'd.tests.': refused,
+                'e.tests.': notauth,
+            },
+            results,
+        )
+        # c was refused twice, d three times before giving up, e wasn't
+        # retried
+        self.assertEqual(
+            [1.0, 2.0, 1.0, 2.0, 4.0],
+            [c.args[0] for c in sleep_mock.call_args_list],
+        )
+
+        # the biggest go first next time, unknowns before them all
+        transferred.clear()
+        responses.update(
+            {
+                'a.tests.': [[1, 2, 3]],
+                'b.tests.': [[1]],
+                'c.tests.': [[1, 2]],
+                'e.tests.': [[]],
+                'f.tests.': [[1, 2, 3, 4]],
+            }
+        )
+        source.transfer_zones(
+            ['b.tests.', 'c.tests.', 'e.tests.', 'a.tests.', 'f.tests.']
+        )
+        self.assertEqual(
+            ['e.tests.', 'f.tests.', 'a.tests.', 'c.tests.', 'b.tests.'],
+            transferred,
+        )
+
+    @patch('octodns_bind.AxfrPopulate._axfr')
+    def test_max_transfers(self, axfr_mock):
+        # the limit is per host and shared by every provider talking to it,
+        # the smallest wins
+        sources = [
+            AxfrSource('one', '127.0.0.1', port=5302, max_transfers=2),
+            AxfrSource('two', '127.0.0.1', port=5302, max_transfers=8),
+        ]
+        lock = Lock()
+        in_flight = [0, 0]
+
+        def axfr(zone):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            return []
+
+        axfr_mock.side_effect = axfr
+
+        # what octoDNS does when planning with max_workers
+        zone_names = iter(range(16))
+
+        def populate():
+            i = next(zone_names)
+            zone = Zone(f'zone{i}.tests.', [])
+            return sources[i % 2].populate(zone)
+
+        # transfers that started under a larger limit aren't held back, so
+        # make sure the smaller is known about before they start
+        _transfer_limit('127.0.0.1', 5302, 2, sources[0].log)
+        run_concurrently(populate)
+        self.assertEqual(16, axfr_mock.call_count)
+        self.assertEqual(2, in_flight[1])
+
+        # whichever order they come in, with warnings when they differ
+        log = Mock()
+        eight = _transfer_limit('127.0.0.1', 5303, 8, log)
+        log.warning.assert_not_called()
+        two = _transfer_limit('127.0.0.1', 5303, 2, log)
+        self.assertIsNot(eight, two)
+        self.assertEqual(
+            ('127.0.0.1', 5303, 8, 2), log.warning.call_args.args[1:]
+        )
+        for _ in range(2):
+            self.assertIs(two, _transfer_limit('127.0.0.1', 5303, 8, log))
+            self.assertIs(two, _transfer_limit('127.0.0.1', 5303, 2, log))
+        # only once for each configured value
+        self.assertEqual(2, log.warning.call_count)
+        self.assertEqual(
+            ('127.0.0.1', 5303, 8, 2), log.warning.call_args.args[1:]
+        )
+
 
 class TestZoneFileSource(TestCase):
     source = ZoneFileSource('test', './tests/zones', file_extension='.tst')
@@ -166,6 +535,62 @@ class TestZoneFileSource(TestCase):
         self.source.populate(invalid, lenient=True)
         self.assertEqual(12, len(invalid.records))
 
+    def test_populate_concurrent(self):
+        source = ZoneFileSource('test', './tests/zones', file_extension='.tst')
+        load_zone_file = source._load_zone_file
+        loads = []
+
+        def slow_load_zone_file(zone_name, target):
+            loads.append(zone_name)
+            sleep(0.1)
+            return load_zone_file(zone_name, target)
+
+        zone_names = ('unit.tests.', 'invalid.zone.')
+        expected = {
+            'unit.tests.': 23,
+            'invalid.zone.': ZoneFileSourceLoadFailure,
+        }
+
+        def populate_all():
+            got = {}
+            for zone_name in zone_names:
+                zone = Zone(zone_name, [])
+                try:
+                    source.populate(zone)
+                    got[zone_name] = len(zone.records)
+                except ZoneFileSourceLoadFailure as err:
+                    got[zone_name] = err.__class__
+            return got
+
+        with patch.object(
+            source, '_load_zone_file', side_effect=slow_load_zone_file
+        ):
+            self.assertEqual([expected] * 16, run_concurrently(populate_all))
+            # each zone was parsed exactly once, failures aren't cached so
+            # the invalid one is parsed once per wave of threads, here one
+            self.assertEqual(sorted(zone_names), sorted(loads))
+
+            # a thread that finds it loaded once it gets its turn uses that
+            zone = Zone('unit.tests.', [])
+            self.assertIs(
+                source._zone_records[zone.name],
+                source._load_zone_records(zone, False),
+            )
+            self.assertEqual(2, len(loads))
+
+        # and it can still be pickled, e.g. to ship off to worker processes
+        # without what it's cached, which loads again when it's needed
+        copy = pickle.loads(pickle.dumps(source))
+        self.assertEqual({}, copy._zone_records)
+        self.assertEqual(
+            [repr(rr) for rr in source._zone_records['unit.tests.']],
+            [
+                repr(rr)
+                for rr in copy.zone_records(Zone('unit.tests.', []), False)
+            ],
+        )
+        self.assertIsNot(source._single_flight, copy._single_flight)
+
     def test_list_zones(self):
         source = ZoneFileSource('test', './tests/zones')
         self.assertEqual(
@@ -226,6 +651,66 @@ class TestZoneFileSource(TestCase):
             self.assertFalse(exists)
             self.assertFalse(empty_provider.zone_exists(zone, target=True))
 
+    def test_plan_lazy_existing(self):
+        eager = ZoneFileProvider('test', './tests/zones', read_existing=True)
+        lazy = ZoneFileProvider(
+            'test', './tests/zones', read_existing=True, lazy_existing=True
+        )
+
+        def summary(plan):
+            if plan is None:
+                return None
+            return sorted(
+                (
+                    c.__class__.__name__,
+                    c.record.name,
+                    c.record._type,
+                    c.existing.rrs if c.existing else None,
+                    c.new.rrs if c.new else None,
+                )
+                for c in plan.changes
+            )
+
+        # unchanged, not a single record has to be built, even the ones that
+        # octoDNS writes differently from dnspython
+        desired = Zone('unit.tests.', [])
+        ZoneFileSource('source', './tests/zones').populate(desired)
+        self.assertIsNone(eager.plan(desired))
+        with self.assertLogs(lazy.log) as logs:
+            self.assertIsNone(lazy.plan(desired))
+        self.assertIn(
+            'INFO:ZoneFileProvider[test]:_process_existing_zone: built 0 of 23 records',
+            logs.output,
+        )
+        # values dnspython can't make sense of are left as they are
+        self.assertEqual(['nope'], _rdata_to_text('A', ['nope']))
+
+        # populate leaves building the records until planning
+        existing = Zone('unit.tests.', [])
+        self.assertTrue(lazy.populate(existing, target=True))
+        self.assertEqual(0, len(existing.records))
+        self.assertEqual(23, len(lazy._lazy_nodes.pop('unit.tests.')[0]))
+
+        # a record that's changed, one that's been added, and one that's gone
+        desired.add_record(
+            Record.new(
+                desired, 'www', {'type': 'A', 'ttl': 300, 'value': '2.3.4.5'}
+            ),
+            replace=True,
+        )
+        desired.add_record(
+            Record.new(
+                desired, 'added', {'type': 'A', 'ttl': 42, 'value': '1.2.3.4'}
+            )
+        )
+        desired.remove_record(
+            next(r for r in desired.records if r.name == 'included')
+        )
+        expected = summary(eager.plan(desired))
+        self.assertEqual(3, len(expected))
+        self.assertEqual(expected, summary(lazy.plan(desired)))
+        self.assertEqual({}, lazy._lazy_nodes)
+
     def test_split_long_txt_record(self):
         long_txt = 'a' * 300
 
@@ -375,6 +860,173 @@ txt       45 IN TXT      "hello \\" world"
                     fh.read(),
                 )
 
+    def test_apply_changes(self):
+        source = ZoneFileSource('source', './tests/zones')
+        base = Zone('unit.tests.', [])
+        source.populate(base)
+
+        rng = Random(42)
+        for _ in range(50):
+            existing = Zone('unit.tests.', [])
+            for record in base.records:
+                if rng.random() < 0.8:
+                    existing.add_record(record)
+
+            changes = []
+            for record in existing.records:
+                roll = rng.random()
+                if roll < 0.2:
+                    changes.append(Delete(record))
+                elif roll < 0.4:
+                    data = record.data
+                    data['type'] = record._type
+                    data['ttl'] = rng.randint(1, 86400)
+                    new = Record.new(existing, record.name, data)
+                    changes.append(Update(record, new))
+            for i in range(rng.randint(0, 5)):
+                new = Record.new(
+                    existing,
+                    f'new-{i}',
+                    {'type': 'A', 'ttl': 42, 'value': f'10.0.0.{i}'},
+                )
+                changes.append(Create(new))
+            rng.shuffle(changes)
+
+            # the same as copying and applying to the zone
+            copy = existing.copy()
+            copy.apply(changes)
+            self.assertEqual(
+                [(r.name, r._type, r.rrs) for r in sorted(copy.records)],
+                [
+                    (r.name, r._type, r.rrs)
+                    for r in _apply_changes(existing.records, changes)
+                ],
+            )
+
+    def test_apply_atomic(self):
+        with TemporaryDirectory() as td:
+            provider = ZoneFileProvider('target', td.dirname)
+            desired = Zone('unit.tests.', [])
+            a = Record.new(
+                desired, 'a', {'type': 'A', 'ttl': 42, 'value': '1.2.3.4'}
+            )
+            desired.add_record(a)
+            plan = Plan(Zone(desired.name, []), desired, [Create(a)], True)
+            provider._apply(plan)
+            filename = join(td.dirname, 'unit.tests.')
+            with open(filename) as fh:
+                before = fh.read()
+
+            # blow up part way through rendering
+            def render(*args, **kwargs):
+                yield 'partial'
+                raise Exception('boom')
+
+            with patch.object(provider, '_render', render):
+                with self.assertRaises(Exception) as ctx:
+                    provider._apply(plan)
+                self.assertEqual('boom', str(ctx.exception))
+
+            # the existing file is untouched and the temp file was cleaned up
+            with open(filename) as fh:
+                self.assertEqual(before, fh.read())
+            self.assertEqual(['unit.tests.'], listdir(td.dirname))
+
+            # blow up before anything was written
+            with patch('octodns_bind.open', side_effect=OSError('nope')):
+                with self.assertRaises(OSError):
+                    provider._apply(plan)
+            self.assertEqual(['unit.tests.'], listdir(td.dirname))
+
+    def _batch_plans(self, names):
+        plans = []
+        for name in names:
+            desired = Zone(name, [])
+            a = Record.new(
+                desired, 'a', {'type': 'A', 'ttl': 42, 'value': '1.2.3.4'}
+            )
+            desired.add_record(a)
+            plans.append(
+                Plan(Zone(desired.name, []), desired, [Create(a)], True)
+            )
+        return plans
+
+    def test_apply_batch(self):
+        names = [f'zone{i}.tests.' for i in range(8)]
+        with TemporaryDirectory() as td:
+            provider = ZoneFileProvider('target', td.dirname)
+            results = provider.apply_batch(
+                self._batch_plans(names), max_workers=2
+            )
+            self.assertEqual({n: 1 for n in names}, results)
+            self.assertEqual(names, list(provider.list_zones()))
+            for name in names:
+                with open(join(td.dirname, name)) as fh:
+                    self.assertIn('a       42 IN A        1.2.3.4\n', fh.read())
+
+    def test_apply_batch_processes(self):
+        with TemporaryDirectory() as td:
+            copyfile(
+                './tests/zones/unit.tests.', join(td.dirname, 'unit.tests.')
+            )
+            # the watcher and profiler can't go to the worker processes
+            provider = ZoneFileProvider(
+                'target',
+                td.dirname,
+                read_existing=True,
+                watch=True,
+                profile_directory=join(td.dirname, 'profile'),
+            )
+            zone = Zone('unit.tests.', [])
+            provider.populate(zone, target=True)
+            self.assertEqual(23, len(zone.records))
+
+            desired = Zone('unit.tests.', [])
+            for name, data in (
+                ('', {'type': 'NS', 'ttl': 42, 'value': 'ns1.unit.tests.'}),
+                ('a', {'type': 'A', 'ttl': 42, 'value': '1.2.3.4'}),
+            ):
+                desired.add_record(Record.new(desired, name, data))
+            plan = provider.plan(desired)
+            # nothing that's been cached goes along with it
+            self.assertTrue(provider._zone_records)
+            state = pickle.loads(pickle.dumps(provider)).__dict__
+            self.assertEqual({}, state['_zone_records'])
+            self.assertEqual({}, state['_lazy_nodes'])
+            self.assertIsNone(state['_zone_shard_assignments'])
+            results = provider.apply_batch([plan], max_workers=2)
+            self.assertEqual({'unit.tests.': len(plan.changes)}, results)
+
+            # what the worker wrote is seen, not what was cached before
+            zone = Zone('unit.tests.', [])
+            provider.populate(zone, target=True)
+            self.assertEqual(2, len(zone.records))
+            provider._profiler.flush()
+
+    def test_apply_batch_failures(self):
+        names = ('bad.tests.', 'good.tests.', 'other.tests.')
+        with TemporaryDirectory() as td:
+            provider = ZoneFileProvider('target', td.dirname)
+            render = provider._render
+
+            def fail_bad(name, *args, **kwargs):
+                if name == 'bad.tests.':
+                    raise Exception('boom')
+                return render(name, *args, **kwargs)
+
+            with patch.object(provider, '_render', fail_bad):
+                results = provider.apply_batch(
+                    self._batch_plans(names), max_workers=1
+                )
+
+            # the failure is reported, but didn't stop the rest
+            error = results.pop('bad.tests.')
+            self.assertEqual('boom', str(error))
+            self.assertEqual({'good.tests.': 1, 'other.tests.': 1}, results)
+            self.assertEqual(
+                ['good.tests.', 'other.tests.'], list(provider.list_zones())
+            )
+
     @patch('octodns_bind.ZoneFileProvider._serial')
     def test_apply_read_existing_preserves_unchanged_records(self, serial_mock):
         # Regression: with read_existing=True, _apply must rewrite the zone
@@ -475,6 +1127,168 @@ txt       45 IN TXT      "hello \\" world"
             self.assertIn('SOA ns1.unit.tests.', content)
             self.assertNotIn(f'SOA ns.{zone_name}', content)
 
+    @patch('octodns_bind.ZoneFileProvider._serial')
+    def test_content_digest(self, serial_mock):
+        serial_mock.side_effect = [111111, 222222, 333333, 444444]
+
+        with TemporaryDirectory() as td:
+            provider = ZoneFileProvider(
+                'target', td.dirname, read_existing=True, content_digest=True
+            )
+            filename = join(td.dirname, 'unit.tests.')
+            self.assertIsNone(provider._read_digest(filename))
+
+            desired = Zone('unit.tests.', [])
+            source = ZoneFileSource('source', './tests/zones')
+            source.populate(desired)
+
+            plan = provider.plan(desired)
+            self.assertEqual(23, len(plan.changes))
+            provider.apply(plan)
+            with open(filename) as fh:
+                content = fh.read()
+            digest = provider._digest('unit.tests.', sorted(desired.records))
+            self.assertTrue(
+                content.startswith(f'; Digest: sha256:{digest}\n$ORIGIN')
+            )
+            self.assertEqual(digest, provider._read_digest(filename))
+            self.assertIn('111111 ; Serial', content)
+
+            # nothing's changed so the file isn't even read
+            with patch.object(provider, 'zone_records') as zone_records_mock:
+                self.assertIsNone(provider.plan(desired))
+                zone_records_mock.assert_not_called()
+
+            # processors could change things so they skip the shortcut
+            with patch.object(provider, 'zone_records') as zone_records_mock:
+                zone_records_mock.return_value = []
+                provider.plan(desired, processors=[BaseProcessor('noop')])
+                zone_records_mock.assert_called_once()
+
+            # a plan that wouldn't change the contents doesn't touch the file
+            provider.apply(plan)
+            with open(filename) as fh:
+                self.assertEqual(content, fh.read())
+
+            # but one that does, does
+            desired.add_record(
+                Record.new(
+                    desired,
+                    'added',
+                    {'type': 'A', 'ttl': 42, 'value': '1.2.3.4'},
+                )
+            )
+            plan = provider.plan(desired)
+            self.assertEqual(1, len(plan.changes))
+            provider.apply(plan)
+            self.assertEqual(
+                provider._digest('unit.tests.', sorted(desired.records)),
+                provider._read_digest(filename),
+            )
+            with open(filename) as fh:
+                self.assertIn('222222 ; Serial', fh.read())
+
+            # changing how the file is written changes it, even though the
+            # records haven't
+            provider = ZoneFileProvider(
+                'target',
+                td.dirname,
+                read_existing=True,
+                content_digest=True,
+                compact=True,
+                zonemd=True,
+            )
+            # the shortcut isn't taken
+            with patch.object(provider, 'zone_records') as zone_records_mock:
+                zone_records_mock.return_value = []
+                provider.plan(desired)
+                zone_records_mock.assert_called_once()
+            # and applying rewrites it
+            provider.apply(plan)
+            with open(filename) as fh:
+                content = fh.read()
+            self.assertIn('\n$TTL ', content)
+            self.assertIn(' ZONEMD ', content)
+            self.assertIsNone(provider.plan(desired))
+
+            # and a file without a digest
+            ZoneFileProvider('target', td.dirname).apply(plan)
+            self.assertIsNone(provider._read_digest(filename))
+
+    def test_profile(self):
+        with TemporaryDirectory() as td:
+            profile_directory = join(td.dirname, 'profiles')
+            copyfile(
+                './tests/zones/unit.tests.', join(td.dirname, 'unit.tests.')
+            )
+            provider = ZoneFileProvider(
+                'test', td.dirname, profile_directory=profile_directory
+            )
+
+            zone = Zone('unit.tests.', [])
+            provider.populate(zone)
+            # nothing's written until the zone has been
+            self.assertFalse(exists(profile_directory))
+            plan = self._batch_plans(['unit.tests.'])[0]
+            with patch(
+                'octodns_bind._write_atomic', wraps=_write_atomic
+            ) as write_mock:
+                provider.apply(plan)
+            self.assertTrue(
+                exists(join(profile_directory, 'unit.tests.folded'))
+            )
+            # just its stacks, once, and the zone file
+            self.assertEqual(
+                [
+                    join(td.dirname, 'unit.tests.'),
+                    join(profile_directory, 'unit.tests.folded'),
+                ],
+                [c.args[0] for c in write_mock.call_args_list],
+            )
+            # the summary is written when flushed
+            self.assertFalse(exists(join(profile_directory, 'summary.txt')))
+            provider._profiler.flush()
+
+            with open(join(profile_directory, 'summary.txt')) as fh:
+                summary = [line.split() for line in fh]
+            self.assertEqual(
+                ['zone', 'phase', 'seconds', 'samples'], summary[0]
+            )
+            self.assertEqual(
+                [
+                    ['unit.tests.', 'apply_changes'],
+                    ['unit.tests.', 'from_rrs'],
+                    ['unit.tests.', 'load'],
+                    ['unit.tests.', 'to_text'],
+                    ['unit.tests.', 'write'],
+                ],
+                [line[:2] for line in summary[1:]],
+            )
+            # flushing again with nothing new doesn't write anything
+            with patch('octodns_bind._write_atomic') as write_mock:
+                provider._profiler.flush()
+                write_mock.assert_not_called()
+
+            # without it there's nothing
+            self.assertIsNone(ZoneFileProvider('test', td.dirname)._profiler)
+
+        with TemporaryDirectory() as td:
+            profiler = _Profiler(td.dirname)
+            with profiler.phase('0/25.2.0.192.in-addr.arpa.', 'load'):
+                sleep(0.05)
+            # zones that were never written are written out when flushed
+            profiler.flush()
+            with open(
+                join(td.dirname, '0-25.2.0.192.in-addr.arpa.folded')
+            ) as fh:
+                folded = fh.read().splitlines()
+            self.assertTrue(folded)
+            for line in folded:
+                stack, samples = line.rsplit(' ', 1)
+                self.assertTrue(stack.startswith('load;'))
+                self.assertIn(';test_profile (', stack)
+                self.assertTrue(int(samples) > 0)
+
     @patch('octodns_bind.ZoneFileProvider._serial')
     def test_utf8(self, serial_mock):
         serial_mock.side_effect = [424344]
@@ -585,6 +1399,991 @@ xn--dj-vu-sqa5d       45 IN TXT      "hello world"
                     fh.read(),
                 )
 
+    @patch('octodns_bind.ZoneFileProvider._serial')
+    def test_apply_golden(self, serial_mock):
+        desired = Zone('unit.tests.', [])
+        ZoneFileSource('test', './tests/zones', '.tst').populate(desired)
+        # utf-8 name, long & quoted TXT values
+        for name, data in (
+            ('déjà-vu', {'type': 'TXT', 'ttl': 45, 'value': 'hello world'}),
+            (
+                'déjà-vu',
+                {'type': 'A', 'ttl': 46, 'values': ('1.1.1.1', '1.1.1.2')},
+            ),
+            (
+                'long',
+                {
+                    'type': 'TXT',
+                    'ttl': 47,
+                    'values': ('a' * 300, 'b' * 255, 'say "hi"'),
+                },
+            ),
+        ):
+            desired.add_record(Record.new(desired, name, data))
+
+        with open('./tests/golden/unit.tests.zone') as fh:
+            expected = fh.read()
+        self.maxDiff = None
+
+        changes = [Create(r) for r in desired.records]
+        plan = Plan(Zone(desired.name, []), desired, changes, True)
+        # the default chunk size, everything in one go, and a tiny size to
+        # force lots of chunk boundaries
+        for chunk_size in (ZoneFileProvider.RENDER_CHUNK_SIZE, 1, 3):
+            serial_mock.side_effect = [424344]
+            with TemporaryDirectory() as td:
+                provider = ZoneFileProvider('target', td.dirname)
+                provider.RENDER_CHUNK_SIZE = chunk_size
+                provider._apply(plan)
+
+                with open(join(td.dirname, 'unit.tests.')) as fh:
+                    self.assertEqual(expected, fh.read())
+
+    def test_render_records(self):
+        zone = Zone('unit.tests.', [])
+        # nothing to render
+        self.assertEqual([], list(self.source._render_records([])))
+
+        # a (lenient) record without any values is skipped entirely
+        empty = Record.new(
+            zone, 'empty', {'type': 'A', 'ttl': 42, 'values': []}, lenient=True
+        )
+        a = Record.new(zone, 'a', {'type': 'A', 'ttl': 42, 'value': '1.2.3.4'})
+        self.assertEqual(
+            ['a           42 IN A        1.2.3.4\n'],
+            list(self.source._render_records([a, empty])),
+        )
+
+    @patch('octodns_bind.ZoneFileProvider._serial')
+    def test_compact(self, serial_mock):
+        serial_mock.return_value = 424344
+        source = ZoneFileSource('source', './tests/zones')
+        desired = Zone('unit.tests.', [])
+        source.populate(desired)
+        plan = Plan(
+            Zone('unit.tests.', []),
+            desired,
+            [Create(r) for r in desired.records],
+            True,
+        )
+
+        with TemporaryDirectory() as td:
+            ZoneFileProvider('target', td.dirname).apply(plan)
+            with open(join(td.dirname, 'unit.tests.')) as fh:
+                padded = fh.read()
+
+            for fast_load in (False, True):
+                provider = ZoneFileProvider(
+                    'target', td.dirname, compact=True, fast_load=fast_load
+                )
+                provider.apply(plan)
+                with open(join(td.dirname, 'unit.tests.')) as fh:
+                    compact = fh.read()
+                self.assertTrue(len(compact) < len(padded) * 0.75)
+                self.assertTrue(
+                    compact.startswith('$ORIGIN unit.tests.\n$TTL 300\n')
+                )
+                # the default is left off, others aren't, owners only once
+                self.assertIn(
+                    '\nmx IN MX 10 smtp-4.unit.tests.\n IN MX 20 smtp-2',
+                    compact,
+                )
+                self.assertIn('\ncaa 1800 IN CAA 0 iodef', compact)
+
+                # and everything round trips
+                got = Zone('unit.tests.', [])
+                provider.populate(got)
+                self.assertEqual(len(desired.records), len(got.records))
+                self.assertFalse(desired.changes(got, provider))
+
+        # nothing to go on
+        self.assertEqual(3600, self.source._common_ttl([]))
+
+    @patch('octodns_bind.ZoneFileProvider._serial')
+    def test_shards(self, serial_mock):
+        serial_mock.return_value = 424344
+        source = ZoneFileSource('source', './tests/zones')
+        desired = Zone('unit.tests.', [])
+        source.populate(desired)
+        plan = Plan(
+            Zone('unit.tests.', []),
+            desired,
+            [Create(r) for r in desired.records],
+            True,
+        )
+
+        with TemporaryDirectory() as td:
+            shards = join(td.dirname, 'unit.tests..shards')
+            for compact in (False, True):
+                provider = ZoneFileProvider(
+                    'target', td.dirname, shards=4, compact=compact
+                )
+                provider.apply(plan)
+                with open(join(td.dirname, 'unit.tests.')) as fh:
+                    main = fh.read()
+                # the apex and includes of the shards are in the main file
+                self.assertIn('IN SOA', main)
+                self.assertIn('\n@ ', main)
+                self.assertTrue(
+                    main.endswith(
+                        ''.join(
+                            f'$INCLUDE unit.tests..shards/000{i}\n'
+                            for i in range(4)
+                        )
+                    )
+                )
+                self.assertNotIn('www', main)
+                self.assertEqual(
+                    ['0000', '0001', '0002', '0003'], sorted(listdir(shards))
+                )
+
+                # everything round trips, both ways of loading, whether the
+                # reader is configured with shards or not
+                for fast_load in (False, True):
+                    for reader_shards in (0, 4):
+                        provider = ZoneFileProvider(
+                            'target',
+                            td.dirname,
+                            shards=reader_shards,
+                            compact=compact,
+                            fast_load=fast_load,
+                        )
+                        got = Zone('unit.tests.', [])
+                        provider.populate(got)
+                        self.assertEqual(len(desired.records), len(got.records))
+                        self.assertFalse(desired.changes(got, provider))
+                        # the shards are loaded on a pool shared by every zone
+                        self.assertIs(
+                            provider._shard_loader(), provider._shard_loader()
+                        )
+
+            # empty files don't include anything
+            empty = join(td.dirname, 'empty.tests.')
+            with open(empty, 'w'):
+                pass
+            self.assertFalse(provider._has_includes(empty))
+
+            # changing a record only rewrites the shard it lives in
+            existing = Zone('unit.tests.', [])
+            provider.populate(existing)
+            changed = existing.copy()
+            www = next(r for r in existing.records if r.name == 'www')
+            new = Record.new(
+                changed,
+                'www',
+                {'type': 'A', 'ttl': www.ttl, 'value': '9.9.9.9'},
+            )
+            changed.add_record(new, replace=True)
+            with patch(
+                'octodns_bind._write_atomic', wraps=_write_atomic
+            ) as write_mock:
+                provider.apply(
+                    Plan(existing, changed, [Update(www, new)], True)
+                )
+            self.assertEqual(
+                [
+                    join(shards, f'000{provider._shard("www")}'),
+                    join(td.dirname, 'unit.tests.'),
+                ],
+                [c.args[0] for c in write_mock.call_args_list],
+            )
+
+            # fewer shards cleans up the extras
+            provider = ZoneFileProvider('target', td.dirname, shards=2)
+            provider.apply(plan)
+            self.assertEqual(['0000', '0001'], sorted(listdir(shards)))
+
+            # shards the fast loader can't handle fall back to dnspython
+            with open(join(shards, '0000'), 'a') as fh:
+                fh.write('$GENERATE 1-2 gen$ 300 A 1.2.3.$\n')
+            got = Zone('unit.tests.', [])
+            provider.populate(got)
+            self.assertIn('gen2', {r.name for r in got.records})
+
+            # and then failures are reported
+            with open(join(shards, '0000'), 'a') as fh:
+                fh.write('gen CH A 1.2.3.4\n')
+            provider = ZoneFileProvider('target', td.dirname, shards=2)
+            with self.assertRaises(ZoneFileSourceLoadFailure):
+                provider.populate(Zone('unit.tests.', []))
+
+            # shards are loaded in worker processes, check them directly too
+            path = join(shards, '0000')
+            for fast_load in (False, True):
+                with self.assertRaises(ZoneFileSourceLoadFailure):
+                    _load_zone_shard(path, 'unit.tests.', fast_load)
+            with open(path, 'w') as fh:
+                fh.write('$ORIGIN unit.tests.\na 42 IN A 1.2.3.4\n')
+            for fast_load in (False, True):
+                self.assertEqual(
+                    [('a.unit.tests.', 42, 'A', '1.2.3.4')],
+                    _load_zone_shard(path, 'unit.tests.', fast_load),
+                )
+
+    def test_includes(self):
+        soa = (
+            '$ORIGIN unit.tests.\n'
+            '@ 3600 IN SOA ns1.unit.tests. root.unit.tests. 1 2 3 4 5\n'
+            '@ 3600 IN NS ns1.unit.tests.\n'
+        )
+        with TemporaryDirectory() as td:
+            sub = join(td.dirname, 'sub.inc')
+            with open(sub, 'w') as fh:
+                fh.write('a 42 IN A 1.2.3.4\n')
+            # a hand-written include with an origin, and one that looks like a
+            # shard but comes along with it, are both left to dnspython
+            makedirs(join(td.dirname, 'unit.tests..shards'))
+            shard = join(td.dirname, 'unit.tests..shards', '0000')
+            with open(shard, 'w') as fh:
+                fh.write('b 42 IN A 2.3.4.5\n')
+            for contents, expected in (
+                (f'{soa}$INCLUDE {sub} sub.unit.tests.\n', {'a.sub'}),
+                (
+                    f'{soa}$INCLUDE {shard}\n'
+                    '$INCLUDE unit.tests..shards/0000\n',
+                    None,
+                ),
+            ):
+                for opener, ext in ((open, ''), (gzip.open, '.gz')):
+                    path = join(td.dirname, f'unit.tests.{ext}')
+                    with opener(path, 'wt') as fh:
+                        fh.write(contents)
+                    for fast_load in (False, True):
+                        provider = ZoneFileProvider(
+                            'target', td.dirname, fast_load=fast_load
+                        )
+                        got = Zone('unit.tests.', [])
+                        if expected is None:
+                            # relative to the working directory, not the zone
+                            # file, so the second include isn't found
+                            with self.assertRaises(FileNotFoundError):
+                                provider.populate(got)
+                        else:
+                            provider.populate(got)
+                            self.assertEqual(
+                                expected,
+                                {r.name for r in got.records if r.name},
+                            )
+                    remove(path)
+
+    def test_crlf(self):
+        with open('./tests/zones/unit.tests.', 'rb') as fh:
+            contents = fh.read().replace(b'\n', b'\r\n')
+        expected = Zone('unit.tests.', [])
+        ZoneFileSource('source', './tests/zones').populate(expected)
+        with TemporaryDirectory() as td:
+            # compressed or not, like dnspython's from_file does
+            for opener, ext in ((open, ''), (gzip.open, '.gz')):
+                path = join(td.dirname, f'unit.tests.{ext}')
+                with opener(path, 'wb') as fh:
+                    fh.write(contents)
+                for fast_load in (False, True):
+                    got = Zone('unit.tests.', [])
+                    ZoneFileSource(
+                        'test', td.dirname, fast_load=fast_load
+                    ).populate(got)
+                    self.assertEqual(len(expected.records), len(got.records))
+                    self.assertFalse(expected.changes(got, self.source))
+                remove(path)
+
+    @patch('octodns_bind.ZoneFileProvider._serial')
+    def test_compression(self, serial_mock):
+        serial_mock.return_value = 424344
+        with self.assertRaises(ZoneFileSourceException) as ctx:
+            ZoneFileProvider('test', '.', compression='zip')
+        self.assertEqual(
+            'Unsupported compression zip, must be one of gzip, bz2, xz',
+            str(ctx.exception),
+        )
+
+        source = ZoneFileSource('source', './tests/zones')
+        desired = Zone('unit.tests.', [])
+        source.populate(desired)
+        plan = Plan(
+            Zone('unit.tests.', []),
+            desired,
+            [Create(r) for r in desired.records],
+            True,
+        )
+
+        with TemporaryDirectory() as td:
+            plain = join(td.dirname, 'unit.tests.')
+            ZoneFileProvider('target', td.dirname).apply(plan)
+            with open(plain) as fh:
+                expected = fh.read()
+
+            previous = plain
+            for compression, ext, opener in (
+                ('gzip', '.gz', gzip.open),
+                ('bz2', '.bz2', bz2.open),
+                ('xz', '.xz', lzma.open),
+            ):
+                provider = ZoneFileProvider(
+                    'target',
+                    td.dirname,
+                    compression=compression,
+                    content_digest=True,
+                    read_existing=True,
+                )
+                provider.apply(plan)
+                # written compressed, the previous copy is gone
+                self.assertEqual([f'unit.tests.{ext}'], listdir(td.dirname))
+                self.assertFalse(exists(previous))
+                previous = f'{plain}{ext}'
+                with opener(previous, 'rt') as fh:
+                    # same as uncompressed, after the digest line
+                    self.assertEqual(expected, fh.read().split('\n', 1)[1])
+
+                # it's found, and read, whatever the setting
+                for reader in (
+                    ZoneFileProvider('target', td.dirname, fast_load=False),
+                    ZoneFileSource('source', td.dirname),
+                ):
+                    self.assertEqual(['unit.tests.'], list(reader.list_zones()))
+                    self.assertTrue(reader.zone_exists(desired))
+                    got = Zone('unit.tests.', [])
+                    reader.populate(got)
+                    self.assertFalse(desired.changes(got, provider))
+
+                # the digest can be read back out of it
+                self.assertIsNone(provider.plan(desired))
+
+            # both copies around, the configured one is preferred
+            with open(plain, 'w') as fh:
+                fh.write('garbage')
+            self.assertEqual(previous, provider._find_zone_file('unit.tests.'))
+            self.assertEqual(['unit.tests.'], list(provider.list_zones()))
+            remove(plain)
+
+            # shards are compressed too
+            provider = ZoneFileProvider(
+                'target', td.dirname, compression='gzip', shards=2
+            )
+            provider.apply(plan)
+            shards = join(td.dirname, 'unit.tests..gz.shards')
+            self.assertEqual(['0000.gz', '0001.gz'], sorted(listdir(shards)))
+            got = Zone('unit.tests.', [])
+            ZoneFileProvider('target', td.dirname, shards=2).populate(got)
+            self.assertFalse(desired.changes(got, provider))
+
+            # migration keeps the compression
+            provider = ZoneFileProvider(
+                'target', td.dirname, directory_layout='prefix'
+            )
+            self.assertEqual(['unit.tests.'], provider.migrate_directory())
+            self.assertTrue(
+                exists(join(td.dirname, 'u', 'un', 'unit.tests..gz'))
+            )
+
+    @patch('octodns_bind.ZoneFileProvider._serial')
+    def test_notify(self, serial_mock):
+        serial_mock.return_value = 424344
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        sock.settimeout(0.05)
+        port = sock.getsockname()[1]
+        stop = Event()
+        received = []
+
+        def serve():
+            while not stop.is_set():
+                try:
+                    wire, addr = sock.recvfrom(65535)
+                except socket.timeout:
+                    continue
+                query = dns.message.from_wire(wire)
+                name = query.question[0].name.to_text()
+                received.append((query.opcode(), name))
+                response = dns.message.make_response(query)
+                if name == 'refused.tests.':
+                    response.set_rcode(dns.rcode.REFUSED)
+                elif name == 'drop.tests.':
+                    continue
+                sock.sendto(response.to_wire(), addr)
+
+        thread = Thread(target=serve)
+        thread.start()
+
+        source = ZoneFileSource('source', './tests/zones')
+        desired = Zone('unit.tests.', [])
+        source.populate(desired)
+        plan = Plan(
+            Zone('unit.tests.', []),
+            desired,
+            [Create(r) for r in desired.records],
+            True,
+        )
+
+        try:
+            with TemporaryDirectory() as td:
+                # only the changed zone is notified and reloaded
+                check = 'import sys; sys.exit(sys.argv[1] != "unit.tests.")'
+                provider = ZoneFileProvider(
+                    'target',
+                    td.dirname,
+                    content_digest=True,
+                    notify=['127.0.0.1'],
+                    notify_port=port,
+                    reload_command=[sys.executable, '-c', check, '$zone'],
+                    notify_timeout=0.5,
+                )
+                provider.apply(plan)
+                self.assertEqual(
+                    [
+                        ('unit.tests.', '127.0.0.1', True),
+                        ('unit.tests.', 'reload', True),
+                    ],
+                    provider.wait_notifications(),
+                )
+                self.assertEqual([(dns.opcode.NOTIFY, 'unit.tests.')], received)
+
+                # nothing changed, nothing written, nothing sent
+                provider.apply(plan)
+                self.assertEqual([], provider.wait_notifications())
+
+                # failures are reported
+                provider._notify_zone('refused.tests.')
+                provider._notify_zone('drop.tests.')
+                self.assertEqual(
+                    [
+                        ('refused.tests.', '127.0.0.1', False),
+                        ('refused.tests.', 'reload', False),
+                        ('drop.tests.', '127.0.0.1', False),
+                        ('drop.tests.', 'reload', False),
+                    ],
+                    provider.wait_notifications(),
+                )
+
+                # it can still be shipped off to workers
+                provider = pickle.loads(pickle.dumps(provider))
+                self.assertIsNone(provider._notifier)
+                self.assertEqual([], provider._notifications)
+
+                # just notifies
+                provider = ZoneFileProvider(
+                    'target', td.dirname, notify=['127.0.0.1'], notify_port=port
+                )
+                provider._notify_zone('unit.tests.')
+                self.assertEqual(
+                    [('unit.tests.', '127.0.0.1', True)],
+                    provider.wait_notifications(),
+                )
+
+                # off by default
+                provider = ZoneFileProvider('target', td.dirname)
+                provider._notify_zone('unit.tests.')
+                self.assertIsNone(provider._notifier)
+        finally:
+            stop.set()
+            thread.join()
+            sock.close()
+
+    def test_zone_shards(self):
+        for index, count in ((1, 1), (-1, 2), (3, 3)):
+            with self.assertRaises(ZoneFileSourceException) as ctx:
+                ZoneFileProvider(
+                    'test', '.', zone_shard_index=index, zone_shard_count=count
+                )
+            self.assertEqual(
+                f'Invalid zone_shard_index {index}, must be from 0 to zone_shard_count - 1',
+                str(ctx.exception),
+            )
+
+        with TemporaryDirectory() as td:
+            rng = Random(42)
+            weights = {}
+            for i in range(60):
+                zone_name = f'zone-{i}.tests.'
+                weights[zone_name] = rng.randint(1, 10000)
+                with open(join(td.dirname, zone_name), 'w') as fh:
+                    fh.write('x' * weights[zone_name])
+            copyfile(
+                './tests/zones/unit.tests.', join(td.dirname, 'unit.tests.')
+            )
+            # not a zone file, ignored
+            with open(join(td.dirname, 'notes.txt'), 'w') as fh:
+                fh.write('x' * 100000)
+            everything = list(ZoneFileProvider('test', td.dirname).list_zones())
+
+            for count in (2, 3, 5):
+                weights_path = join(td.dirname, f'weights-{count}.json')
+                providers = [
+                    ZoneFileProvider(
+                        'test',
+                        td.dirname,
+                        zone_shard_index=i,
+                        zone_shard_count=count,
+                        zone_shard_weights=weights_path,
+                    )
+                    for i in range(count)
+                ]
+                shards = [list(p.list_zones()) for p in providers]
+                # every zone is in exactly one shard, in the usual order
+                self.assertEqual(
+                    sorted(everything), sorted(z for s in shards for z in s)
+                )
+                for shard in shards:
+                    self.assertEqual(
+                        [z for z in everything if z in shard], shard
+                    )
+                # and the work is spread out evenly
+                loads = [
+                    sum(stat(join(td.dirname, z)).st_size for z in shard)
+                    for shard in shards
+                ]
+                self.assertTrue(max(loads) <= 1.25 * sum(loads) / count)
+
+                # populate only works on the shard's zones
+                unit = next(
+                    p for p in providers if 'unit.tests.' in p.list_zones()
+                )
+                got = Zone('unit.tests.', [])
+                unit.populate(got)
+                self.assertTrue(got.records)
+                other = next(p for p in providers if p is not unit)
+                with self.assertRaises(ZoneFileSourceException) as ctx:
+                    other.populate(Zone('unit.tests.', []))
+                self.assertEqual(
+                    f'unit.tests. is not in zone_shard_index {other.zone_shard_index} of {count}',
+                    str(ctx.exception),
+                )
+                # as a target it's fine, the zones come from elsewhere
+                self.assertEqual(
+                    [], other.zone_records(Zone('unit.tests.', []), True)
+                )
+
+                # zones without files go to their preferred shard
+                owner = _rendezvous('new.tests.', count)[0]
+                for i, provider in enumerate(providers):
+                    self.assertEqual(
+                        i == owner, provider._in_zone_shard('new.tests.')
+                    )
+
+            # the weights were written once, rewriting the zone files doesn't
+            # move anything about
+            with open(join(td.dirname, 'zone-0.tests.'), 'w') as fh:
+                fh.write('x' * 1000000)
+            self.assertEqual(shards, [list(p.list_zones()) for p in providers])
+
+            # someone else wrote the weights while we were working them out,
+            # theirs win
+            weights_path = join(td.dirname, 'weights-racing.json')
+            provider = ZoneFileProvider(
+                'test',
+                td.dirname,
+                zone_shard_index=1,
+                zone_shard_count=2,
+                zone_shard_weights=weights_path,
+            )
+
+            def racing_link(src, dst):
+                with open(dst, 'w') as fh:
+                    json.dump({'unit.tests.': 1}, fh)
+                raise FileExistsError(dst)
+
+            with patch('octodns_bind.link', side_effect=racing_link):
+                self.assertEqual(
+                    {'unit.tests.': 1}, provider._zone_shard_weights()
+                )
+            self.assertEqual(
+                ['weights-racing.json'],
+                [
+                    f
+                    for f in listdir(td.dirname)
+                    if f.startswith('weights-racing')
+                ],
+            )
+
+            # without weights it's plain rendezvous hashing, which doesn't
+            # depend on anything in the directory
+            for i in range(3):
+                provider = ZoneFileProvider(
+                    'test', td.dirname, zone_shard_index=i, zone_shard_count=3
+                )
+                self.assertEqual(
+                    [z for z in everything if _rendezvous(z, 3)[0] == i],
+                    list(provider.list_zones()),
+                )
+
+        # adding a shard only moves zones onto it
+        before = _assign_shards(weights, 4, slack=inf)
+        after = _assign_shards(weights, 5, slack=inf)
+        for zone_name, shard in after.items():
+            self.assertIn(shard, (before[zone_name], 4))
+        # everything fits nowhere, the least loaded gets it
+        self.assertEqual(
+            {'a.': 1, 'b.': 0, 'c.': 0},
+            _assign_shards({'a.': 4, 'b.': 2, 'c.': 2}, 2, slack=0),
+        )
+
+    @patch('octodns_bind.ZoneFileProvider._serial')
+    def test_zonemd(self, serial_mock):
+        serial_mock.return_value = 424344
+        source = ZoneFileSource('source', './tests/zones')
+        desired = Zone('unit.tests.', [])
+        source.populate(desired)
+        plan = Plan(
+            Zone('unit.tests.', []),
+            desired,
+            [Create(r) for r in desired.records],
+            True,
+        )
+
+        with TemporaryDirectory() as td:
+            path = join(td.dirname, 'unit.tests.')
+            provider = ZoneFileProvider('target', td.dirname, zonemd=True)
+            provider.apply(plan)
+            with open(path) as fh:
+                contents = fh.read()
+            self.assertIn('\n@ 3600 IN ZONEMD 424344 1 1 ', contents)
+
+            # it's valid and matches what's in the file
+            zone = dns.zone.from_file(path, 'unit.tests.', relativize=False)
+            zone.verify_digest()
+
+            # and is ignored when reading things back in
+            got = Zone('unit.tests.', [])
+            ZoneFileProvider('target', td.dirname).populate(got)
+            self.assertFalse(desired.changes(got, provider))
+
+            # the main file of a sharded zone has the same one
+            ZoneFileProvider('target', td.dirname, zonemd=True, shards=2).apply(
+                plan
+            )
+            with open(path) as fh:
+                sharded = fh.read()
+            zonemd = next(
+                line for line in contents.split('\n') if 'ZONEMD' in line
+            )
+            self.assertIn(f'\n{zonemd}\n', sharded)
+
+    @patch('octodns_bind.ZoneFileProvider._serial')
+    def test_mirror(self, serial_mock):
+        serial_mock.return_value = 424344
+        source = ZoneFileSource('source', './tests/zones')
+
+        with TemporaryDirectory() as td:
+            target = ZoneFileProvider('target', td.dirname)
+            # a copy from when things were compressed
+            stale = join(td.dirname, 'unit.tests..gz')
+            with gzip.open(stale, 'wt') as fh:
+                fh.write('stale')
+            results = target.mirror(source, ['unit.tests.', 'missing.tests.'])
+            self.assertEqual(2, len(results))
+            self.assertFalse(exists(stale))
+            self.assertIsInstance(
+                results['missing.tests.'], ZoneFileSourceNotFound
+            )
+            # everything but the SOA, which is ours
+            rrs = source.zone_records(Zone('unit.tests.', []), False)
+            self.assertEqual(
+                len([rr for rr in rrs if rr._type in target.SUPPORTS]),
+                results['unit.tests.'],
+            )
+
+            # the same as if it'd been synced
+            expected = Zone('unit.tests.', [])
+            source.populate(expected)
+            got = Zone('unit.tests.', [])
+            ZoneFileProvider('check', td.dirname).populate(got)
+            self.assertEqual(len(expected.records), len(got.records))
+            self.assertFalse(expected.changes(got, target))
+            with open(join(td.dirname, 'unit.tests.')) as fh:
+                contents = fh.read()
+            self.assertIn('@ 3600 IN SOA ns1.unit.tests. webmaster', contents)
+            self.assertIn('\nwww 300 IN A 2.2.3.6\n', contents)
+
+            # defaults to everything the source has, names are lowercased,
+            # RRsets get their lowest TTL, and types we don't support are
+            # dropped
+            with patch.object(source, 'zone_records') as zone_records_mock:
+                zone_records_mock.return_value = [
+                    Rr('Mixed.Other.Tests.', 'A', 60, '1.2.3.4'),
+                    Rr('mixed.other.tests.', 'A', 30, '1.2.3.5'),
+                    Rr('mixed.other.tests.', 'BOGUS', 30, 'nope'),
+                ]
+                with patch.object(source, 'list_zones') as list_zones_mock:
+                    list_zones_mock.return_value = iter(['other.tests.'])
+                    self.assertEqual({'other.tests.': 2}, target.mirror(source))
+            with open(join(td.dirname, 'other.tests.')) as fh:
+                contents = fh.read()
+            # no NS to go on
+            self.assertIn('IN SOA ns.other.tests. webmaster', contents)
+            self.assertTrue(
+                contents.endswith(
+                    'mixed 30 IN A 1.2.3.4\nmixed 30 IN A 1.2.3.5\n'
+                )
+            )
+
+            # big zones are written in chunks
+            target.RENDER_CHUNK_SIZE = 2
+            self.assertEqual(
+                results['unit.tests.'],
+                target.mirror(source, ['unit.tests.'])['unit.tests.'],
+            )
+            got = Zone('unit.tests.', [])
+            ZoneFileProvider('check', td.dirname).populate(got)
+            self.assertFalse(expected.changes(got, target))
+
+    def test_directory_layout_invalid(self):
+        with self.assertRaises(ZoneFileSourceException) as ctx:
+            ZoneFileProvider('test', '.', directory_layout='nested')
+        self.assertEqual(
+            'Unsupported directory_layout nested, must be one of flat, hashed, prefix',
+            str(ctx.exception),
+        )
+
+    def test_directory_layouts(self):
+        names = ('0/25.10.10.10.in-addr.arpa.', 'other.tests.', 'unit.tests.')
+        for layout, depth, expected in (
+            (
+                'flat',
+                2,
+                ('0-25.10.10.10.in-addr.arpa.', 'other.tests.', 'unit.tests.'),
+            ),
+            (
+                'hashed',
+                2,
+                (
+                    'c/cf/0-25.10.10.10.in-addr.arpa.',
+                    'd/d7/other.tests.',
+                    '8/89/unit.tests.',
+                ),
+            ),
+            (
+                'hashed',
+                1,
+                (
+                    'c/0-25.10.10.10.in-addr.arpa.',
+                    'd/other.tests.',
+                    '8/unit.tests.',
+                ),
+            ),
+            (
+                'prefix',
+                2,
+                (
+                    '0/0-/0-25.10.10.10.in-addr.arpa.',
+                    'o/ot/other.tests.',
+                    'u/un/unit.tests.',
+                ),
+            ),
+        ):
+            with TemporaryDirectory() as td:
+                provider = ZoneFileProvider(
+                    'target',
+                    td.dirname,
+                    check_origin=False,
+                    read_existing=True,
+                    directory_layout=layout,
+                    directory_depth=depth,
+                )
+                # stray files at the intermediate levels are ignored
+                with open(join(td.dirname, 'stray.'), 'w') as fh:
+                    fh.write('')
+
+                for plan in self._batch_plans(names):
+                    # the zone is missing so far
+                    self.assertFalse(
+                        provider.zone_exists(plan.desired, target=True)
+                    )
+                    provider._apply(plan)
+                    # without listing the directory, it can be huge
+                    with patch('octodns_bind.listdir') as listdir_mock:
+                        self.assertTrue(
+                            provider.zone_exists(plan.desired, target=True)
+                        )
+                    listdir_mock.assert_not_called()
+
+                for name, path in zip(names, expected):
+                    self.assertTrue(exists(join(td.dirname, path)))
+                    # we can read it back
+                    zone = Zone(name, [])
+                    provider.populate(zone, target=True)
+                    self.assertEqual(1, len(zone.records))
+
+                listed = sorted(provider.list_zones())
+                if layout == 'flat':
+                    self.assertIn('stray.', listed)
+                    listed.remove('stray.')
+                self.assertEqual(
+                    [
+                        '0-25.10.10.10.in-addr.arpa.',
+                        'other.tests.',
+                        'unit.tests.',
+                    ],
+                    listed,
+                )
+
+    def test_migrate_directory(self):
+        names = ('other.tests.', 'unit.tests.')
+        with TemporaryDirectory() as td:
+            flat = ZoneFileProvider('flat', td.dirname, file_extension='.zone')
+            for plan in self._batch_plans(names):
+                flat._apply(plan)
+            # other files and directories are left alone
+            with open(join(td.dirname, 'README'), 'w') as fh:
+                fh.write('')
+            makedirs(join(td.dirname, 'dir.zone'))
+            # a sharded zone
+            makedirs(join(td.dirname, 'unit.tests.zone.shards'))
+            with open(join(td.dirname, 'unit.tests.zone.shards', '0000'), 'w'):
+                pass
+
+            # nothing to do for the flat layout
+            self.assertEqual([], flat.migrate_directory())
+
+            hashed = ZoneFileProvider(
+                'hashed',
+                td.dirname,
+                file_extension='.zone',
+                directory_layout='hashed',
+            )
+            # nothing's there yet
+            self.assertEqual([], list(hashed.list_zones()))
+            self.assertEqual(list(names), hashed.migrate_directory())
+            self.assertEqual(list(names), sorted(hashed.list_zones()))
+            self.assertEqual(
+                ['8', 'README', 'd', 'dir.zone'], sorted(listdir(td.dirname))
+            )
+            self.assertTrue(
+                exists(join(td.dirname, '8', '89', 'unit.tests.zone'))
+            )
+            # shards go along with their zone file, it includes them relative
+            # to where it is
+            self.assertEqual(
+                ['0000'],
+                listdir(join(td.dirname, '8', '89', 'unit.tests.zone.shards')),
+            )
+            # and a 2nd run is a noop
+            self.assertEqual([], hashed.migrate_directory())
+
+    def _write_zone(self, provider, name, content='; empty\n'):
+        filename = provider._zone_path(name)
+        makedirs(dirname(filename), exist_ok=True)
+        with open(filename, 'w') as fh:
+            fh.write(content)
+        return filename
+
+    def assertWatches(self, **kwargs):
+        with TemporaryDirectory() as td:
+            # other files are ignored, whether there beforehand or not
+            with open(join(td.dirname, 'README'), 'w') as fh:
+                fh.write('')
+            provider = ZoneFileProvider(
+                'watch',
+                td.dirname,
+                file_extension='.zone',
+                watch=True,
+                **kwargs,
+            )
+            self._write_zone(provider, 'unit.tests.')
+            self._write_zone(provider, 'other.tests.')
+            with open(join(td.dirname, 'NOTES'), 'w') as fh:
+                fh.write('')
+            self.assertEqual(
+                ['other.tests.', 'unit.tests.'], list(provider.dirty_zones())
+            )
+            # nothing since
+            self.assertEqual([], list(provider.dirty_zones()))
+
+            # cached records for the dirty zones are dropped, the rest kept
+            provider._zone_records = {
+                'unit.tests.': [],
+                'other.tests.': [],
+                '0/25.2.0.192.in-addr.arpa.': [],
+            }
+            self._write_zone(provider, 'unit.tests.', '; changed\n')
+            self._write_zone(provider, '0/25.2.0.192.in-addr.arpa.')
+            remove(provider._zone_path('other.tests.'))
+            self._write_zone(provider, 'new.tests.')
+            self.assertEqual(
+                [
+                    '0/25.2.0.192.in-addr.arpa.',
+                    'new.tests.',
+                    'other.tests.',
+                    'unit.tests.',
+                ],
+                list(provider.dirty_zones()),
+            )
+            self.assertEqual({}, provider._zone_records)
+            self.assertEqual([], list(provider.dirty_zones()))
+
+            # changes to a zone's shards are changes to the zone
+            shards = f'{provider._zone_path("unit.tests.")}.shards'
+            makedirs(shards)
+            with open(join(shards, '0000'), 'w') as fh:
+                fh.write('; shard\n')
+            self.assertEqual(['unit.tests.'], list(provider.dirty_zones()))
+            with open(join(shards, '0000'), 'w') as fh:
+                fh.write('; changed shard\n')
+            self.assertEqual(['unit.tests.'], list(provider.dirty_zones()))
+            self.assertEqual([], list(provider.dirty_zones()))
+
+            # including ones that were there before we started watching
+            again = ZoneFileProvider(
+                'watch',
+                td.dirname,
+                file_extension='.zone',
+                watch=True,
+                **kwargs,
+            )
+            self.assertEqual([], list(again.dirty_zones()))
+            with open(join(shards, '0001'), 'w') as fh:
+                fh.write('; new shard\n')
+            self.assertEqual(['unit.tests.'], list(again.dirty_zones()))
+
+            return provider
+
+    def test_watch(self):
+        self.assertIsInstance(self.assertWatches()._watcher, _Inotify)
+        self.assertIsInstance(
+            self.assertWatches(directory_layout='hashed')._watcher, _Inotify
+        )
+
+        with patch.object(_Inotify, '__init__') as init_mock:
+            init_mock.side_effect = AttributeError('nope')
+            self.assertIsInstance(self.assertWatches()._watcher, _Polling)
+            self.assertIsInstance(
+                self.assertWatches(directory_layout='prefix')._watcher, _Polling
+            )
+
+        # inotify_init1 failing
+        with patch('octodns_bind.CDLL') as cdll_mock:
+            cdll_mock.return_value.inotify_init1.return_value = -1
+            with TemporaryDirectory() as td:
+                provider = ZoneFileProvider('watch', td.dirname, watch=True)
+                self.assertIsInstance(provider._watcher, _Polling)
+
+        # a directory that doesn't exist (yet) can't be watched by inotify
+        provider = ZoneFileProvider('watch', '/does/not/exist', watch=True)
+        self.assertIsInstance(provider._watcher, _Polling)
+        self.assertEqual([], list(provider.dirty_zones()))
+
+        # not enabled
+        with self.assertRaises(ZoneFileSourceException) as ctx:
+            ZoneFileProvider('watch', '/does/not/exist').dirty_zones()
+        self.assertEqual('dirty_zones requires watch: true', str(ctx.exception))
+
+    def test_watch_overflow(self):
+        with TemporaryDirectory() as td:
+            provider = ZoneFileProvider(
+                'watch', td.dirname, file_extension='.zone', watch=True
+            )
+            self.assertIsInstance(provider._watcher, _Inotify)
+            self._write_zone(provider, 'unit.tests.')
+            self.assertEqual(['unit.tests.'], list(provider.dirty_zones()))
+            provider._zone_records = {'other.tests.': []}
+
+            overflow = _Inotify.EVENT.pack(-1, _Inotify.IN_Q_OVERFLOW, 0, 0)
+            with patch('octodns_bind.read') as read_mock:
+                read_mock.side_effect = [overflow, BlockingIOError()]
+                # everything that's there along with everything we've cached
+                self.assertEqual(
+                    ['other.tests.', 'unit.tests.'],
+                    list(provider.dirty_zones()),
+                )
+
     def test_primary_nameserver(self):
         # no records (thus no root NS records) we get the placeholder
         self.assertEqual(
@@ -710,6 +2509,282 @@ xn--dj-vu-sqa5d       45 IN TXT      "hello world"
         self.assertTrue(self.source._now())
 
 
+class TestZoneFileFastLoad(TestCase):
+    soa = '@ 3600 IN SOA ns1.unit.tests. root.unit.tests. 1 2 3 4 5\n'
+    ns = '@ 3600 IN NS ns1.unit.tests.\n'
+
+    def assertLoadsSame(self, content, fast=True, check_origin=True):
+        if isinstance(content, str):
+            content = content.encode()
+        with TemporaryDirectory() as td:
+            path = join(td.dirname, 'unit.tests.')
+            with open(path, 'wb') as fh:
+                fh.write(content)
+
+            got = []
+            for fast_load in (False, True):
+                provider = ZoneFileProvider(
+                    'test',
+                    td.dirname,
+                    check_origin=check_origin,
+                    fast_load=fast_load,
+                )
+                try:
+                    rdatas = provider._load_zone_file('unit.tests.', False)
+                    got.append([(n, t, y, str(r)) for n, t, y, r in rdatas])
+                except ZoneFileSourceLoadFailure as e:
+                    got.append(str(e))
+            # the fast loader's results are identical to dnspython's
+            self.assertEqual(got[0], got[1])
+
+            # and it either handled the file itself or fell back to dnspython
+            handled = provider._fast_load_zone_file(path, 'unit.tests.')
+            self.assertEqual(fast, handled is not None)
+
+            return got[1]
+
+    def test_zone_files(self):
+        # all of our test zone files load identically
+        for directory, extension, zone_name in (
+            ('./tests/zones', '.tst', 'unit.tests.'),
+            ('./tests/zones', '.tst', 'invalid.records.'),
+            ('./tests/zones', '.tst', 'invalid.zone.'),
+            ('./tests/zones', '.', '2.0.192.in-addr.arpa.'),
+            ('./tests/zones', '.extension', 'ext.unit.tests.'),
+        ):
+            got = []
+            for fast_load in (False, True):
+                provider = ZoneFileProvider(
+                    'test',
+                    directory,
+                    file_extension=extension,
+                    fast_load=fast_load,
+                )
+                zone = Zone(zone_name, [])
+                try:
+                    got.append(
+                        [
+                            (r.name, r._type, r.ttl, r.rdata)
+                            for r in provider.zone_records(zone, False)
+                        ]
+                    )
+                except ZoneFileSourceLoadFailure as e:
+                    got.append(str(e))
+            self.assertEqual(got[0], got[1])
+
+    def test_syntax(self):
+        got = self.assertLoadsSame(f'''$TTL 1h
+$ORIGIN unit.tests.
+{self.soa}
+; comments, blank lines, and leading whitespace
+    IN NS ns1.unit.tests.  ; inherits the @ owner
+  IN NS ns2
+
+www.unit.tests. 30 IN A 1.2.3.4
+www IN 31 A 1.2.3.5
+    A 1.2.3.4
+WWW IN A 1.2.3.6
+aaaa IN AAAA 2001:DB8:0:0::1
+txt IN TXT "hello" "world"
+txt IN TXT ( "multi" ; with a comment
+  "line" )
+txt IN TXT unquoted
+txt IN TXT "esc\\"aped\\\\"
+mx IN MX 10 mx1
+mx IN MX 20 mx2.unit.tests.
+cname IN CNAME @
+srv ( IN SRV 1 2 3
+    target )
+other.zone. IN A 1.2.3.4
+$ORIGIN sub.unit.tests.
+a IN A 1.2.3.4
+cname IN CNAME target
+ptr IN PTR .''')
+        self.assertIn(('www.unit.tests.', 30, 'A', '1.2.3.6'), got)
+        self.assertIn(
+            ('cname.sub.unit.tests.', 3600, 'CNAME', 'target.sub.unit.tests.'),
+            got,
+        )
+        self.assertNotIn('other.zone.', [r[0] for r in got])
+
+    def test_ttls(self):
+        # no $TTL, SOA without a TTL sets the default
+        self.assertLoadsSame(
+            f'@ IN SOA ns1.unit.tests. root.unit.tests. 1 2 3 4 5\n{self.ns}'
+            'a IN A 1.2.3.4\n'
+        )
+        # $TTL takes precedence over the SOA
+        got = self.assertLoadsSame(
+            f'$TTL 42\n{self.soa}{self.ns}a IN A 1.2.3.4\n'
+        )
+        self.assertEqual(('a.unit.tests.', 42, 'A', '1.2.3.4'), got[-1])
+        # last explicit TTL before there's a SOA
+        self.assertLoadsSame(
+            f'a 42 IN A 1.2.3.4\nb IN A 1.2.3.4\n{self.soa}{self.ns}'
+        )
+        # no TTL at all
+        self.assertLoadsSame('a IN A 1.2.3.4\n', fast=False, check_origin=False)
+        # invalid TTLs
+        self.assertLoadsSame(
+            f'{self.soa}{self.ns}a 1x IN A 1.2.3.4\n', fast=False
+        )
+        self.assertLoadsSame(f'$TTL forever\n{self.soa}{self.ns}', fast=False)
+
+    def test_unsupported(self):
+        for content in (
+            # directives
+            f'$ORIGIN relative\n{self.soa}{self.ns}',
+            f'$UNKNOWN value\n{self.soa}{self.ns}',
+            f'$GENERATE 1-2 a$ A 1.2.3.$\n{self.soa}{self.ns}',
+            f'$TTL\n{self.soa}{self.ns}',
+            # classes
+            f'{self.soa}{self.ns}a CH A 1.2.3.4\n',
+            f'{self.soa}{self.ns}a CLASS1 A 1.2.3.4\n',
+            # names we don't handle
+            f'{self.soa}{self.ns}a\\.b IN A 1.2.3.4\n',
+            # syntax
+            f'{self.soa}{self.ns}a IN TXT "unterminated\n',
+            f'{self.soa}{self.ns}a IN A 1.2.3.4 )\n',
+            f'{self.soa}{self.ns}a IN A ( 1.2.3.4\n',
+            f'{self.soa}{self.ns}a IN TXT "unterminated',
+            f'{self.soa}{self.ns}a\n',
+            f'{self.soa}{self.ns}a IN BOGUS 1.2.3.4\n',
+            # bad rdata
+            f'@ 3600 IN SOA ns1.unit.tests.\n{self.ns}',
+            f'{self.soa}{self.ns}a IN AAAA not-an-ip\n',
+            f'{self.soa}{self.ns}a IN MX ten mx\n',
+            # CNAME and other data
+            f'{self.soa}{self.ns}a IN CNAME b\na IN A 1.2.3.4\n',
+        ):
+            self.assertLoadsSame(content, fast=False)
+
+        with TemporaryDirectory() as td:
+            path = join(td.dirname, 'unit.tests.')
+            provider = ZoneFileProvider('test', td.dirname, fast_load=True)
+
+            # not utf-8
+            with open(path, 'wb') as fh:
+                fh.write(f'{self.soa}{self.ns}a IN TXT "'.encode())
+                fh.write(b'\xff"\n')
+            self.assertIsNone(
+                provider._fast_load_zone_file(path, 'unit.tests.')
+            )
+
+            # empty file
+            with open(path, 'w'):
+                pass
+            self.assertIsNone(
+                provider._fast_load_zone_file(path, 'unit.tests.')
+            )
+
+    def test_check_origin(self):
+        self.assertLoadsSame('a 42 IN A 1.2.3.4\n', fast=False)
+        self.assertLoadsSame(f'{self.soa}a 42 IN A 1.2.3.4\n', fast=False)
+        self.assertLoadsSame(
+            'a 42 IN A 1.2.3.4\nb 43 IN A 1.2.3.4\n', check_origin=False
+        )
+
+    def test_rdatasets(self):
+        got = self.assertLoadsSame(
+            f'{self.soa}{self.ns}a 42 IN A 1.2.3.4\nb 42 IN A 1.2.3.4\n'
+            'a 41 IN A 1.2.3.5\na 43 IN A 1.2.3.4\na 44 IN TXT "hi"\n'
+        )
+        # duplicates are removed, rdatasets share the lowest TTL, and things
+        # are grouped by owner & type in the order they were first seen
+        self.assertEqual(
+            [
+                ('a.unit.tests.', 41, 'A', '1.2.3.4'),
+                ('a.unit.tests.', 41, 'A', '1.2.3.5'),
+                ('a.unit.tests.', 44, 'TXT', '"hi"'),
+                ('b.unit.tests.', 42, 'A', '1.2.3.4'),
+            ],
+            got[2:],
+        )
+
+
+class TestColumnarSource(TestCase):
+    def test_round_trip(self):
+        source = ZoneFileSource('source', './tests/zones')
+        zone_names = ['unit.tests.', '2.0.192.in-addr.arpa.']
+
+        with TemporaryDirectory() as td:
+            filename = join(td.dirname, 'zones.columnar')
+            self.assertEqual(41, source.export_columnar(filename, zone_names))
+
+            columnar = ColumnarSource('columnar', filename)
+            self.assertEqual(sorted(zone_names), columnar.list_zones())
+            for zone_name in zone_names:
+                expected = Zone(zone_name, [])
+                source.populate(expected)
+                got = Zone(zone_name, [])
+                self.assertTrue(columnar.populate(got))
+                self.assertEqual(
+                    23 if zone_name[0] == 'u' else 4, len(got.records)
+                )
+                self.assertFalse(expected.changes(got, columnar))
+
+            # not in the file
+            zone = Zone('other.tests.', [])
+            self.assertFalse(columnar.populate(zone))
+            self.assertEqual(0, len(zone.records))
+
+    def test_empty_zone(self):
+        with TemporaryDirectory() as td:
+            filename = join(td.dirname, 'zones.columnar')
+            writer = _ColumnarWriter()
+            writer.add('empty.tests.', [])
+            writer.add('one.tests.', [Rr('one.tests.', 'A', 42, '1.2.3.4')])
+            writer.write(filename)
+
+            columnar = ColumnarSource('columnar', filename)
+            zone = Zone('empty.tests.', [])
+            self.assertTrue(columnar.populate(zone))
+            self.assertEqual(0, len(zone.records))
+            self.assertEqual(
+                [('one.tests.', 'A', 42, '1.2.3.4')],
+                [
+                    (rr.name, rr._type, rr.ttl, rr.rdata)
+                    for rr in columnar.zone_records(
+                        Zone('one.tests.', []), target=False
+                    )
+                ],
+            )
+
+    def test_concurrent(self):
+        source = ZoneFileSource('source', './tests/zones')
+
+        with TemporaryDirectory() as td:
+            filename = join(td.dirname, 'zones.columnar')
+            source.export_columnar(filename, ['unit.tests.'])
+            columnar = ColumnarSource('columnar', filename)
+
+            def slow_read_columnar(filename):
+                sleep(0.1)
+                return _read_columnar(filename)
+
+            with patch(
+                'octodns_bind._read_columnar', side_effect=slow_read_columnar
+            ) as read_mock:
+                self.assertEqual(
+                    [['unit.tests.']] * 16,
+                    run_concurrently(columnar.list_zones),
+                )
+                self.assertEqual(1, read_mock.call_count)
+
+                # a thread that finds it read once it gets its turn uses that
+                columnar._read()
+                self.assertEqual(1, read_mock.call_count)
+
+    def test_not_columnar(self):
+        columnar = ColumnarSource('columnar', './tests/zones/unit.tests.')
+        with self.assertRaises(ColumnarSourceException) as ctx:
+            columnar.list_zones()
+        self.assertEqual(
+            './tests/zones/unit.tests. is not a columnar export',
+            str(ctx.exception),
+        )
+
+
 class TestRfc2136Provider(TestCase):
     def test_host_ip(self):
         provider = Rfc2136Provider('test', '192.0.2.1')
@@ -726,6 +2801,167 @@ class TestRfc2136Provider(TestCase):
         self.assertEqual(0.9, provider.update_pcent_threshold)
         self.assertEqual(0.8, provider.delete_pcent_threshold)
 
+    @patch('octodns_bind.ZoneFileProvider._serial')
+    def test_zonemd(self, serial_mock):
+        serial_mock.return_value = 424344
+        source = ZoneFileSource('source', './tests/zones')
+        desired = Zone('unit.tests.', [])
+        source.populate(desired)
+        plan = Plan(
+            Zone('unit.tests.', []),
+            desired,
+            [Create(r) for r in desired.records],
+            True,
+        )
+        with TemporaryDirectory() as td:
+            ZoneFileProvider('target', td.dirname, zonemd=True).apply(plan)
+            served = dns.zone.from_file(
+                join(td.dirname, 'unit.tests.'), 'unit.tests.', relativize=False
+            )
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        sock.settimeout(0.05)
+        port = sock.getsockname()[1]
+        stop = Event()
+
+        def serve():
+            while not stop.is_set():
+                try:
+                    wire, addr = sock.recvfrom(65535)
+                except socket.timeout:
+                    continue
+                query = dns.message.from_wire(wire)
+                question = query.question[0]
+                response = dns.message.make_response(query)
+                if question.name.to_text() == 'drop.tests.':
+                    continue
+                rrset = served.get_rrset(question.name, question.rdtype)
+                if rrset is not None:
+                    response.answer.append(rrset)
+                sock.sendto(response.to_wire(), addr)
+
+        thread = Thread(target=serve)
+        thread.start()
+
+        try:
+            provider = Rfc2136Provider(
+                'test', '127.0.0.1', port=port, timeout=0.5, zonemd=True
+            )
+            # matches, so there's no transfer or plan
+            with patch('dns.zone.from_xfr') as from_xfr_mock:
+                self.assertIsNone(provider.plan(desired))
+                from_xfr_mock.assert_not_called()
+
+            # something's changed
+            changed = desired.copy()
+            record = Record.new(
+                changed, 'a', {'type': 'A', 'ttl': 42, 'value': '1.2.3.4'}
+            )
+            changed.add_record(record, replace=True)
+            self.assertFalse(provider._zonemd_matches(changed))
+            with patch(
+                'octodns_bind.Rfc2136Provider.zone_records'
+            ) as zone_records_mock:
+                zone_records_mock.return_value = []
+                self.assertTrue(provider.plan(changed))
+                zone_records_mock.assert_called_once()
+
+            # nothing to go on, the server didn't answer or has no ZONEMD
+            self.assertFalse(provider._zonemd_matches(Zone('drop.tests.', [])))
+            self.assertFalse(provider._zonemd_matches(Zone('none.tests.', [])))
+
+            # ZONEMDs that don't cover the current serial, or use something
+            # we can't compute, are passed over
+            rdataset = served.find_rdataset('unit.tests.', 'ZONEMD')
+            zonemd = rdataset[0]
+            for replacement in (
+                zonemd.replace(serial=zonemd.serial + 1),
+                zonemd.replace(hash_algorithm=241),
+                zonemd.replace(scheme=241),
+            ):
+                rdataset.clear()
+                rdataset.add(replacement)
+                self.assertFalse(provider._zonemd_matches(desired))
+        finally:
+            stop.set()
+            thread.join()
+            sock.close()
+
+    @patch('dns.query.tcp')
+    def test_mirror(self, tcp_mock):
+        provider = Rfc2136Provider('test', '127.0.0.1', update_batch_size=2)
+        source = ZoneFileSource('source', './tests/zones')
+
+        existing = [
+            # unchanged, other than the order of things
+            Rr('unit.tests.', 'A', 300, '1.2.3.5'),
+            Rr('unit.tests.', 'A', 300, '1.2.3.4'),
+            # different TTL
+            Rr('www.unit.tests.', 'A', 60, '2.2.3.6'),
+            # gone
+            Rr('old.unit.tests.', 'A', 60, '2.2.3.6'),
+            Rr('old.unit.tests.', 'TXT', 60, '"old"'),
+            # one apex NS added and one removed
+            Rr('unit.tests.', 'NS', 3600, 'ns1.unit.tests.'),
+            Rr('unit.tests.', 'NS', 3600, 'old.ns.tests.'),
+            # only removed
+            Rr('under.unit.tests.', 'NS', 3600, 'ns1.unit.tests.'),
+            Rr('under.unit.tests.', 'NS', 3600, 'ns2.unit.tests.'),
+            Rr('under.unit.tests.', 'NS', 3600, 'ns3.unit.tests.'),
+        ]
+        with patch.object(provider, 'zone_records') as zone_records_mock:
+            zone_records_mock.return_value = existing
+            tcp_mock.return_value = dns.message.make_response(
+                dns.message.make_query('unit.tests.', 'SOA')
+            )
+            results = provider.mirror(source, ['unit.tests.'])
+
+        rrs = source.zone_records(Zone('unit.tests.', []), False)
+        rrsets = {(rr.name, rr._type) for rr in rrs if rr._type != 'SOA'}
+        # everything but the unchanged apex A, plus the two deletes
+        self.assertEqual({'unit.tests.': len(rrsets) + 1}, results)
+        updates = [c.args[0] for c in tcp_mock.call_args_list]
+        self.assertEqual((len(rrsets) + 2) // 2, len(updates))
+        text = '\n'.join(u.to_text() for u in updates)
+        self.assertIn('\nold.unit.tests. ANY A\n', text)
+        self.assertIn('\nold.unit.tests. ANY TXT\n', text)
+        self.assertIn('\nwww.unit.tests. 300 IN A 2.2.3.6\n', text)
+        self.assertNotIn('\nunit.tests. 300 IN A', text)
+        # only the values that changed, adds ahead of deletes
+        add = text.index('\nunit.tests. 3600 IN NS ns2\n')
+        delete = text.index('\nunit.tests. 0 NONE NS old.ns.tests.\n')
+        self.assertLess(add, delete)
+        self.assertNotIn('\nunit.tests. 3600 IN NS ns1\n', text)
+        self.assertIn('\nunder.unit.tests. 0 NONE NS ns3\n', text)
+        self.assertNotIn('\nunder.unit.tests. 3600 IN NS', text)
+
+        # the apex NS RRset is never deleted as a whole, servers ignore that
+        tcp_mock.reset_mock()
+        with patch.object(provider, 'zone_records') as zone_records_mock:
+            zone_records_mock.return_value = existing
+            with patch.object(source, 'zone_records') as source_mock:
+                source_mock.return_value = []
+                results = provider.mirror(source, ['unit.tests.'])
+        self.assertEqual({'unit.tests.': 6}, results)
+        text = '\n'.join(c.args[0].to_text() for c in tcp_mock.call_args_list)
+        self.assertIn('\nunit.tests. 0 NONE NS old.ns.tests.\n', text)
+        self.assertNotIn('\nunit.tests. ANY NS\n', text)
+        self.assertIn('\nunder.unit.tests. ANY NS\n', text)
+
+        # failures are reported
+        response = dns.message.make_response(
+            dns.message.make_query('unit.tests.', 'SOA')
+        )
+        response.set_rcode(dns.rcode.REFUSED)
+        tcp_mock.return_value = response
+        with patch.object(provider, 'zone_records') as zone_records_mock:
+            zone_records_mock.return_value = []
+            results = provider.mirror(source, ['unit.tests.'])
+        self.assertIsInstance(
+            results['unit.tests.'], Rfc2136ProviderUpdateFailed
+        )
+
     @patch('socket.getaddrinfo')
     def test_host_dns(self, resolve_mock):
         host, ipv4, ipv6 = 'axfr.unit.tests.', '192.0.2.2', '2001:db8::1'
@@ -818,11 +3054,11 @@ class TestRfc2136Provider(TestCase):
         self.assertTrue(plan)
         self.assertRaises(Rfc2136ProviderUpdateFailed, provider.apply, plan)
         dns_query_tcp_mock.assert_called_once()
-        replace_mock.assert_called_with('a.unit.tests.', 42, 'A', '1.2.3.4')
-        add_mock.assert_not_called()
-        delete_mock.assert_not_called()
+        delete_mock.assert_called_with('a.unit.tests.', 'A', '2.3.4.5')
+        add_mock.assert_called_with('a.unit.tests.', 42, 'A', '1.2.3.4')
+        replace_mock.assert_not_called()
 
-        # update
+        # update, only the value changed so it's deleted and the new one added
         reset()
         zone_records_mock.side_effect = [
             [Rr('a.unit.tests.', 'A', 42, '2.3.4.5')]
@@ -831,9 +3067,22 @@ class TestRfc2136Provider(TestCase):
         self.assertTrue(plan)
         provider.apply(plan)
         dns_query_tcp_mock.assert_called_once()
-        replace_mock.assert_called_with('a.unit.tests.', 42, 'A', '1.2.3.4')
-        add_mock.assert_not_called()
+        delete_mock.assert_called_with('a.unit.tests.', 'A', '2.3.4.5')
+        add_mock.assert_called_with('a.unit.tests.', 42, 'A', '1.2.3.4')
+        replace_mock.assert_not_called()
+
+        # update, the TTL changed so every value is added with the new one
+        reset()
+        zone_records_mock.side_effect = [
+            [Rr('a.unit.tests.', 'A', 43, '1.2.3.4')]
+        ]
+        plan = provider.plan(desired)
+        self.assertTrue(plan)
+        provider.apply(plan)
+        dns_query_tcp_mock.assert_called_once()
+        add_mock.assert_called_with('a.unit.tests.', 42, 'A', '1.2.3.4')
         delete_mock.assert_not_called()
+        replace_mock.assert_not_called()
 
         # delete
         reset()
@@ -848,3 +3097,473 @@ class TestRfc2136Provider(TestCase):
         delete_mock.assert_called_with('a.unit.tests.', 'A', '2.3.4.5')
         add_mock.assert_not_called()
         replace_mock.assert_not_called()
+
+    def test_update_rrset(self):
+        provider = Rfc2136Provider('test', '127.0.0.1')
+        zone = Zone('unit.tests.', [])
+
+        def change(existing, new, existing_ttl=42):
+            return Update(
+                Record.new(
+                    zone,
+                    'a',
+                    {'type': 'A', 'ttl': existing_ttl, 'values': existing},
+                ),
+                Record.new(zone, 'a', {'type': 'A', 'ttl': 42, 'values': new}),
+            )
+
+        values = [f'10.0.{i // 256}.{i % 256}' for i in range(2000)]
+
+        # one value changed out of 2000, 2 RRs rather than 2001
+        update = DnsUpdate('unit.tests.')
+        saved = provider._update_rrset(
+            update, change(values, values[:-1] + ['192.0.2.1']), measure=True
+        )
+        self.assertEqual((2001 - 2) * 16 - 4, saved)
+        # adds go ahead of deletes
+        self.assertEqual(
+            [
+                'a.unit.tests. 42 IN A 192.0.2.1',
+                'a.unit.tests. 0 NONE A 10.0.7.207',
+            ],
+            [rrset.to_text() for rrset in update.update],
+        )
+        # without measuring nothing's parsed
+        with patch('octodns_bind._rr_wire_size') as rr_wire_size_mock:
+            self.assertEqual(
+                0,
+                provider._update_rrset(
+                    DnsUpdate('unit.tests.'),
+                    change(values, values[:-1] + ['192.0.2.1']),
+                ),
+            )
+            rr_wire_size_mock.assert_not_called()
+
+        # replacing all of the apex NS adds the new ones before deleting the
+        # old, RFC 2136 servers ignore deleting the last of them
+        update = DnsUpdate('unit.tests.')
+        provider._update_rrset(
+            update,
+            Update(
+                Record.new(
+                    zone,
+                    '',
+                    {
+                        'type': 'NS',
+                        'ttl': 42,
+                        'values': ['a.ns.tests.', 'b.ns.tests.'],
+                    },
+                ),
+                Record.new(
+                    zone,
+                    '',
+                    {
+                        'type': 'NS',
+                        'ttl': 42,
+                        'values': ['c.ns.tests.', 'd.ns.tests.'],
+                    },
+                ),
+            ),
+        )
+        self.assertEqual(
+            [
+                'unit.tests. 42 IN NS c.ns.tests.',
+                'unit.tests. 42 IN NS d.ns.tests.',
+                'unit.tests. 0 NONE NS a.ns.tests.',
+                'unit.tests. 0 NONE NS b.ns.tests.',
+            ],
+            [rrset.to_text() for rrset in update.update],
+        )
+
+        # values only added
+        update = DnsUpdate('unit.tests.')
+        provider._update_rrset(update, change(values[:2], values[:3]))
+        self.assertEqual(
+            ['a.unit.tests. 42 IN A 10.0.0.2'],
+            [rrset.to_text() for rrset in update.update],
+        )
+
+        # values only removed
+        update = DnsUpdate('unit.tests.')
+        provider._update_rrset(update, change(values[:3], values[:2]))
+        self.assertEqual(
+            ['a.unit.tests. 0 NONE A 10.0.0.2'],
+            [rrset.to_text() for rrset in update.update],
+        )
+
+        # TTL change, everything's added with the new TTL, only the RRset
+        # delete is saved
+        update = DnsUpdate('unit.tests.')
+        saved = provider._update_rrset(
+            update,
+            change(values[:2], values[:2], existing_ttl=43),
+            measure=True,
+        )
+        self.assertEqual(12, saved)
+        self.assertEqual(
+            [
+                'a.unit.tests. 42 IN A 10.0.0.0',
+                'a.unit.tests. 42 IN A 10.0.0.1',
+            ],
+            [rrset.to_text() for rrset in update.update],
+        )
+
+    def test_batch_changes(self):
+        provider = Rfc2136Provider('test', '127.0.0.1', update_batch_size=3)
+        zone = Zone('unit.tests.', [])
+
+        def record(name, _type, value):
+            return Record.new(
+                zone, name, {'type': _type, 'ttl': 42, 'value': value}
+            )
+
+        changes = [
+            Create(record('c', 'A', '1.2.3.4')),
+            Create(record('www', 'CNAME', 'target.unit.tests.')),
+            Create(record('b.a', 'A', '1.2.3.4')),
+            Create(record('', 'A', '1.2.3.4')),
+            Delete(record('www', 'A', '1.2.3.4')),
+            Create(record('a', 'TXT', 'hello')),
+            Update(record('a', 'A', '1.2.3.4'), record('a', 'A', '2.3.4.5')),
+            Create(record('d', 'A', '1.2.3.4')),
+            Create(record('d', 'AAAA', '2001:db8::1')),
+            Create(record('d', 'TXT', 'hello')),
+            Create(record('d', 'SPF', 'v=spf1 -all')),
+        ]
+
+        def summary(change):
+            return (
+                change.__class__.__name__,
+                change.record.name,
+                change.record._type,
+            )
+
+        self.assertEqual(
+            [
+                # canonical order, apex, then a & its children, c, ...
+                [
+                    ('Create', '', 'A'),
+                    ('Update', 'a', 'A'),
+                    ('Create', 'a', 'TXT'),
+                ],
+                [('Create', 'b.a', 'A'), ('Create', 'c', 'A')],
+                # too many changes for d so it has to be split
+                [
+                    ('Create', 'd', 'A'),
+                    ('Create', 'd', 'AAAA'),
+                    ('Create', 'd', 'SPF'),
+                ],
+                # delete before the create at www
+                [
+                    ('Create', 'd', 'TXT'),
+                    ('Delete', 'www', 'A'),
+                    ('Create', 'www', 'CNAME'),
+                ],
+            ],
+            [
+                [summary(c) for c in batch]
+                for batch in provider._batch_changes(changes)
+            ],
+        )
+
+        self.assertEqual([], list(provider._batch_changes([])))
+
+    def test_estimate(self):
+        provider = Rfc2136Provider(
+            'test',
+            '127.0.0.1',
+            update_batch_size=3,
+            key_name='octodns.',
+            key_secret='vZew5TtZLTZKTCl00xliGt+1zzsuLWQWFz48bRbPnZU=',
+        )
+        desired = Zone('unit.tests.', [])
+
+        def record(name, _type, value, zone=desired):
+            return Record.new(
+                zone, name, {'type': _type, 'ttl': 42, 'value': value}
+            )
+
+        changes = [
+            Create(record('', 'A', '1.2.3.4')),
+            Update(record('a', 'A', '1.2.3.4'), record('a', 'A', '2.3.4.5')),
+            Create(record('a', 'TXT', 'hello')),
+            Create(record('b.a', 'A', '1.2.3.4')),
+            Create(record('c', 'A', '1.2.3.4')),
+            Delete(record('www', 'A', '1.2.3.4')),
+            Create(record('www', 'CNAME', 'target.unit.tests.')),
+        ]
+        plan = Plan(Zone(desired.name, []), desired, changes, True)
+
+        # exactly what apply sends
+        sent = []
+
+        def tcp(query, *args, **kwargs):
+            sent.append(len(query.to_wire()))
+            return dns.message.make_response(query)
+
+        with patch('dns.query.tcp', side_effect=tcp):
+            provider.apply(plan)
+        self.assertEqual(3, len(sent))
+
+        estimate = provider.estimate(plan, rtt=0.25)
+        self.assertEqual(
+            {
+                'messages': 3,
+                'round_trips': 3,
+                'sizes': sent,
+                'bytes': sum(sent),
+                'largest': max(sent),
+                'oversized': [],
+                'rtt': 0.25,
+                'duration': 0.75,
+            },
+            estimate,
+        )
+
+        # checkpointing doesn't cost any extra round trips
+        provider.checkpoint_directory = './checkpoints'
+        estimate = provider.estimate(plan, rtt=0.25)
+        self.assertEqual(3, estimate['round_trips'])
+        self.assertEqual(0.75, estimate['duration'])
+        provider.checkpoint_directory = None
+
+        # measures the rtt when it's not given, without sending any updates
+        with patch('dns.query.tcp') as tcp_mock:
+            tcp_mock.return_value.answer = [[Mock(serial=42)]]
+            estimate = provider.estimate(plan)
+        self.assertEqual(1, tcp_mock.call_count)
+        self.assertEqual(
+            dns.rdatatype.SOA, tcp_mock.call_args[0][0].question[0].rdtype
+        )
+        self.assertGreaterEqual(estimate['rtt'], 0)
+        self.assertEqual(3 * estimate['rtt'], estimate['duration'])
+
+        # too big to send, sized with every name written out in full instead
+        big = Zone('unit.tests.', [])
+        changes = [
+            Create(record(f'txt{i:03d}', 'TXT', 'x' * 250, zone=big))
+            for i in range(300)
+        ]
+        plan = Plan(Zone(big.name, []), big, changes, True)
+        provider.update_batch_size = 250
+        estimate = provider.estimate(plan, rtt=0.25)
+        self.assertEqual(2, estimate['messages'])
+        self.assertEqual([1], estimate['oversized'])
+        self.assertGreater(estimate['sizes'][0], 65535)
+        self.assertLess(estimate['sizes'][1], 65535)
+        self.assertEqual(estimate['sizes'][0], estimate['largest'])
+
+    def test_apply_checkpoint(self):
+        existing = Zone('unit.tests.', [])
+        desired = Zone('unit.tests.', [])
+        changes = []
+        for name in ('a', 'b', 'c'):
+            record = Record.new(
+                desired, name, {'type': 'A', 'ttl': 42, 'value': '1.2.3.4'}
+            )
+            desired.add_record(record)
+            changes.append(Create(record))
+        old = Record.new(
+            existing, 'd', {'type': 'A', 'ttl': 42, 'value': '1.1.1.1'}
+        )
+        new = Record.new(
+            desired, 'd', {'type': 'A', 'ttl': 42, 'value': '2.2.2.2'}
+        )
+        gone = Record.new(
+            existing, 'e', {'type': 'A', 'ttl': 42, 'value': '3.3.3.3'}
+        )
+        existing.add_record(old)
+        existing.add_record(gone)
+        desired.add_record(new)
+        changes.extend((Update(old, new), Delete(gone)))
+        plan = Plan(existing, desired, changes, True)
+
+        class FakeServer:
+            def __init__(self, fail=None, stale=False):
+                self.fail = fail
+                self.stale = stale
+                self.applied = []
+                self.prerequisites = []
+
+            def tcp(self, query, *args, **kwargs):
+                response = dns.message.make_response(query)
+                name = query.update[0].name.to_text()
+                self.prerequisites.append(len(query.prerequisite))
+                if name == self.fail:
+                    response.set_rcode(dns.rcode.SERVFAIL)
+                elif self.stale and query.prerequisite:
+                    response.set_rcode(dns.rcode.YXRRSET)
+                else:
+                    self.applied.append(name)
+                return response
+
+        with TemporaryDirectory() as td:
+            checkpoint_directory = join(td.dirname, 'checkpoints')
+
+            def provider():
+                # a fresh one every time, as with another run of octoDNS
+                return Rfc2136Provider(
+                    'test',
+                    '127.0.0.1',
+                    update_batch_size=1,
+                    checkpoint_directory=checkpoint_directory,
+                )
+
+            def apply(plan, server):
+                with patch('dns.query.tcp', side_effect=server.tcp):
+                    provider().apply(plan)
+
+            def plan_again(desired=desired, processors=[]):
+                target = provider()
+                with patch.object(target, 'zone_records') as zone_records_mock:
+                    zone_records_mock.return_value = []
+                    plan = target.plan(desired, processors=processors)
+                # whether the zone had to be transferred
+                return plan, zone_records_mock.called
+
+            path = join(checkpoint_directory, 'unit.tests.json')
+
+            # the first batch goes through, the second fails
+            server = FakeServer(fail='b.unit.tests.')
+            with self.assertRaises(Rfc2136ProviderUpdateFailed):
+                apply(plan, server)
+            self.assertEqual(['a.unit.tests.'], server.applied)
+            with open(path) as fh:
+                checkpoint = json.load(fh)
+            self.assertEqual(
+                {
+                    'zone': 'unit.tests.',
+                    'desired': provider()._desired_hash(desired),
+                    'changes': [
+                        [
+                            'Create',
+                            'b.unit.tests.',
+                            'A',
+                            None,
+                            [42, ['1.2.3.4']],
+                        ],
+                        [
+                            'Create',
+                            'c.unit.tests.',
+                            'A',
+                            None,
+                            [42, ['1.2.3.4']],
+                        ],
+                        [
+                            'Update',
+                            'd.unit.tests.',
+                            'A',
+                            [42, ['1.1.1.1']],
+                            [42, ['2.2.2.2']],
+                        ],
+                        [
+                            'Delete',
+                            'e.unit.tests.',
+                            'A',
+                            [42, ['3.3.3.3']],
+                            None,
+                        ],
+                    ],
+                },
+                checkpoint,
+            )
+
+            # planning again picks up the rest without transferring the zone,
+            # what was there is worked back from the changes
+            resumed, transferred = plan_again()
+            self.assertFalse(transferred)
+            self.assertEqual({'checkpoint': True}, resumed.meta)
+            self.assertEqual(
+                [
+                    ('Delete', 'e', ['3.3.3.3'], None),
+                    ('Create', 'b', None, ['1.2.3.4']),
+                    ('Create', 'c', None, ['1.2.3.4']),
+                    ('Update', 'd', ['1.1.1.1'], ['2.2.2.2']),
+                ],
+                [
+                    (
+                        c.__class__.__name__,
+                        c.record.name,
+                        c.existing.values if c.existing else None,
+                        c.new.values if c.new else None,
+                    )
+                    for c in resumed.changes
+                ],
+            )
+            self.assertEqual(
+                ['a', 'd', 'e'],
+                sorted(r.name for r in resumed.existing.records),
+            )
+
+            # it fails again part way through, the checkpoint moves along
+            server = FakeServer(fail='d.unit.tests.')
+            with self.assertRaises(Rfc2136ProviderUpdateFailed):
+                apply(resumed, server)
+            self.assertEqual(['b.unit.tests.', 'c.unit.tests.'], server.applied)
+            with open(path) as fh:
+                self.assertEqual(
+                    ['d.unit.tests.', 'e.unit.tests.'],
+                    [c[1] for c in json.load(fh)['changes']],
+                )
+
+            # and then finishes, with each RRset checked before it's changed,
+            # cleaning up after itself
+            resumed, transferred = plan_again()
+            self.assertFalse(transferred)
+            server = FakeServer()
+            apply(resumed, server)
+            self.assertEqual(['d.unit.tests.', 'e.unit.tests.'], server.applied)
+            self.assertEqual([1, 1], server.prerequisites)
+            self.assertFalse(exists(path))
+            # nothing to resume, it's planned as usual
+            _, transferred = plan_again()
+            self.assertTrue(transferred)
+
+            # something else changed the zone since, the checkpoint is dropped
+            with self.assertRaises(Rfc2136ProviderUpdateFailed):
+                apply(plan, FakeServer(fail='b.unit.tests.'))
+            resumed, _ = plan_again()
+            server = FakeServer(stale=True)
+            with self.assertRaises(Rfc2136ProviderUpdateFailed) as ctx:
+                apply(resumed, server)
+            self.assertEqual(
+                'Unable to perform update: YXRRSET', str(ctx.exception)
+            )
+            self.assertEqual([], server.applied)
+            self.assertFalse(exists(path))
+
+            # a checkpoint for something else, or planning with processors,
+            # is planned as usual
+            with self.assertRaises(Rfc2136ProviderUpdateFailed):
+                apply(plan, FakeServer(fail='b.unit.tests.'))
+            other = desired.copy()
+            other.add_record(
+                Record.new(
+                    other, 'f', {'type': 'A', 'ttl': 42, 'value': '1.2.3.4'}
+                )
+            )
+            _, transferred = plan_again(other)
+            self.assertTrue(transferred)
+            _, transferred = plan_again(processors=[BaseProcessor('noop')])
+            self.assertTrue(transferred)
+            self.assertTrue(exists(path))
+            remove(path)
+
+            # a plan that goes through sends nothing extra and writes nothing
+            server = FakeServer()
+            apply(plan, server)
+            self.assertEqual([0] * 5, server.prerequisites)
+            self.assertFalse(exists(path))
+
+            # nor is anything written when the first batch fails
+            with self.assertRaises(Rfc2136ProviderUpdateFailed):
+                apply(plan, FakeServer(fail='a.unit.tests.'))
+            self.assertFalse(exists(path))
+
+            # the failure is what's raised even if the checkpoint can't be
+            # written
+            rmtree(checkpoint_directory)
+            with open(checkpoint_directory, 'w'):
+                pass
+            with self.assertRaises(Rfc2136ProviderUpdateFailed):
+                apply(plan, FakeServer(fail='b.unit.tests.'))